@@ -0,0 +1,93 @@
+"""player decision rollups
+
+Revision ID: 20240325_0003
+Revises: 20240310_0001
+Create Date: 2024-03-25 00:03:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+# revision identifiers, used by Alembic.
+revision = '20240325_0003'
+down_revision = '20240310_0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('players', sa.Column('recent_avg_success', sa.Float))
+    op.add_column(
+        'players',
+        sa.Column(
+            'recent_category_counts',
+            JSONB,
+            nullable=False,
+            server_default=sa.text("'{}'::jsonb")
+        )
+    )
+    op.add_column(
+        'players',
+        sa.Column(
+            'decisions_window_json',
+            JSONB,
+            nullable=False,
+            server_default=sa.text("'[]'::jsonb")
+        )
+    )
+
+    # Backfill rollups for existing players from their rated decisions:
+    # the window keeps the last 20, the average covers the last 10 and the
+    # category counts the last 5
+    op.execute("""
+        CREATE TEMPORARY TABLE ranked_decisions ON COMMIT DROP AS
+        SELECT d.player_id, d.success_rating, d.timestamp, s.category,
+               row_number() OVER (
+                   PARTITION BY d.player_id
+                   ORDER BY d.timestamp DESC
+               ) AS rn
+        FROM decisions d
+        JOIN scenarios s ON s.id = d.scenario_id
+        WHERE d.success_rating IS NOT NULL
+    """)
+    op.execute("""
+        UPDATE players p
+        SET decisions_window_json = w.decision_window,
+            recent_avg_success = w.avg_success
+        FROM (
+            SELECT player_id,
+                   jsonb_agg(
+                       jsonb_build_object(
+                           'success_rating', success_rating,
+                           'category', category
+                       ) ORDER BY timestamp
+                   ) AS decision_window,
+                   avg(success_rating) FILTER (WHERE rn <= 10) AS avg_success
+            FROM ranked_decisions
+            WHERE rn <= 20
+            GROUP BY player_id
+        ) w
+        WHERE p.id = w.player_id
+    """)
+    op.execute("""
+        UPDATE players p
+        SET recent_category_counts = c.counts
+        FROM (
+            SELECT player_id, jsonb_object_agg(category, n) AS counts
+            FROM (
+                SELECT player_id, category, count(*) AS n
+                FROM ranked_decisions
+                WHERE rn <= 5 AND category IS NOT NULL
+                GROUP BY player_id, category
+            ) per_category
+            GROUP BY player_id
+        ) c
+        WHERE p.id = c.player_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('players', 'decisions_window_json')
+    op.drop_column('players', 'recent_category_counts')
+    op.drop_column('players', 'recent_avg_success')
@@ -0,0 +1,51 @@
+"""covering timestamp indexes
+
+Revision ID: 20240328_0004
+Revises: 20240325_0003
+Create Date: 2024-03-28 00:04:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20240328_0004'
+down_revision = '20240325_0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Newest-first per-player scans that only need these columns can be
+    # served as index-only scans without heap fetches
+    op.drop_index('idx_decisions_player_timestamp', table_name='decisions')
+    op.create_index(
+        'idx_decisions_player_timestamp',
+        'decisions',
+        ['player_id', sa.text('timestamp DESC')],
+        postgresql_include=['success_rating', 'choice_made', 'scenario_id']
+    )
+
+    op.drop_index('idx_analytics_player_timestamp', table_name='analytics_logs')
+    op.create_index(
+        'idx_analytics_player_timestamp',
+        'analytics_logs',
+        ['player_id', sa.text('timestamp DESC')],
+        postgresql_include=['feature_vector']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_analytics_player_timestamp', table_name='analytics_logs')
+    op.create_index(
+        'idx_analytics_player_timestamp',
+        'analytics_logs',
+        ['player_id', 'timestamp']
+    )
+
+    op.drop_index('idx_decisions_player_timestamp', table_name='decisions')
+    op.create_index(
+        'idx_decisions_player_timestamp',
+        'decisions',
+        ['player_id', 'timestamp']
+    )
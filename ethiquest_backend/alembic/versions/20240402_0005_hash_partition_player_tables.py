@@ -0,0 +1,88 @@
+"""hash partition decisions and analytics_logs by player
+
+Revision ID: 20240402_0005
+Revises: 20240328_0004
+Create Date: 2024-04-02 00:05:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20240402_0005'
+down_revision = '20240328_0004'
+branch_labels = None
+depends_on = None
+
+PARTITIONS = 32
+
+# Per table: foreign keys and indexes to recreate on the new table
+TABLES = {
+    'decisions': {
+        'foreign_keys': {
+            'decisions_player_id_fkey': ('player_id', 'players'),
+            'decisions_scenario_id_fkey': ('scenario_id', 'scenarios'),
+        },
+        'indexes': [
+            "CREATE INDEX idx_decisions_player_timestamp ON {table} "
+            "(player_id, timestamp DESC) "
+            "INCLUDE (success_rating, choice_made, scenario_id)",
+            "CREATE INDEX idx_decisions_scenario ON {table} (scenario_id)",
+        ],
+    },
+    'analytics_logs': {
+        'foreign_keys': {
+            'analytics_logs_player_id_fkey': ('player_id', 'players'),
+        },
+        'indexes': [
+            "CREATE INDEX idx_analytics_player_timestamp ON {table} "
+            "(player_id, timestamp DESC) INCLUDE (feature_vector)",
+        ],
+    },
+}
+
+
+def _rebuild(table: str, spec: dict, partitioned: bool) -> None:
+    """Recreate table with the same columns and copy its rows over"""
+    old = f'{table}_old'
+    op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+
+    partition_clause = ' PARTITION BY HASH (player_id)' if partitioned else ''
+    op.execute(
+        f'CREATE TABLE {table} '
+        f'(LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        f'{partition_clause}'
+    )
+    if partitioned:
+        for remainder in range(PARTITIONS):
+            op.execute(
+                f'CREATE TABLE {table}_p{remainder} PARTITION OF {table} '
+                f'FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})'
+            )
+
+    op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    # Dropping the old table (and any partitions) frees the index and
+    # constraint names for reuse below
+    op.execute(f'DROP TABLE {old}')
+
+    # Unique constraints on a partitioned table must include the
+    # partition key
+    primary_key = 'id, player_id' if partitioned else 'id'
+    op.execute(f'ALTER TABLE {table} ADD PRIMARY KEY ({primary_key})')
+    for name, (column, target) in spec['foreign_keys'].items():
+        op.execute(
+            f'ALTER TABLE {table} ADD CONSTRAINT {name} '
+            f'FOREIGN KEY ({column}) REFERENCES {target} (id)'
+        )
+    # Indexes on the partitioned parent cascade to every partition
+    for index in spec['indexes']:
+        op.execute(index.format(table=table))
+
+
+def upgrade() -> None:
+    for table, spec in TABLES.items():
+        _rebuild(table, spec, partitioned=True)
+
+
+def downgrade() -> None:
+    for table, spec in TABLES.items():
+        _rebuild(table, spec, partitioned=False)
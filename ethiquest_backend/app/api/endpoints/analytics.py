@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from typing import List, Optional, Dict
+import asyncio
 import logging
 from datetime import datetime, timedelta
+from collections import deque
+from pydantic import TypeAdapter
 
 from ...core.analytics.pattern_analyzer import PatternAnalyzer
+from ...models.game_state import GameState
 from ...services.db_service import DBService
 from ...core.cache.cache_service import CacheService
 from ...models.analytics import (
@@ -18,6 +22,12 @@ from ...config import Settings, get_settings
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 logger = logging.getLogger(__name__)
 
+# Built once; serializes straight to JSON bytes without a model_dump dict
+_PA_ADAPTER = TypeAdapter(PlayerAnalytics)
+
+# Absolute impact at which a decision counts as a critical stakeholder event
+CRITICAL_IMPACT_THRESHOLD = 20
+
 # Dependency injection
 async def get_services(
     settings: Settings = Depends(get_settings),
@@ -40,69 +50,45 @@ async def get_player_analytics(
 ):
     """Get comprehensive analytics for a player"""
     try:
-        # Check cache first
-        cache_key = f"analytics:{player_id}:{time_range}"
-        cached_analytics = await services["cache"].get(cache_key)
-        if cached_analytics:
-            return PlayerAnalytics(**cached_analytics)
-
-        # Get player decisions within time range
-        start_date = datetime.utcnow() - timedelta(days=time_range)
-        decisions = await services["db"].get_player_decisions(
-            player_id,
-            start_date=start_date
+        cache = services["cache"]
+        cache_key = (
+            f"analytics:{player_id}:{time_range}:{cache.compression_tag}"
         )
 
-        # Get game state for current metrics
-        game_state = await services["db"].get_game_state(player_id)
-        if not game_state:
+        async def load_analytics() -> Optional[bytes]:
+            analytics = await compute_player_analytics(
+                player_id,
+                time_range,
+                services
+            )
+            if not analytics:
+                return None
+            # Stored zstd-compressed to cut Redis memory and transfer
+            return cache.compress(_PA_ADAPTER.dump_json(analytics))
+
+        # Read through the cache; concurrent misses share one computation
+        # and players without game state are negatively cached
+        cached_analytics = await cache.get_or_load(
+            cache_key,
+            load_analytics,
+            ttl=3600  # 1 hour cache
+        )
+        if cached_analytics is None:
             raise HTTPException(
                 status_code=404,
                 detail="Player game state not found"
             )
 
-        # Analyze patterns and progress
-        patterns = services["pattern_analyzer"].analyze_patterns(decisions)
-        learning_progress = await analyze_learning_progress(
-            player_id,
-            decisions,
-            services
-        )
-        skill_progress = await analyze_skill_progress(
-            player_id,
-            decisions,
-            services
-        )
-        stakeholder_analytics = analyze_stakeholder_relations(
-            decisions,
-            game_state
-        )
-
-        # Compile analytics
-        analytics = PlayerAnalytics(
-            player_id=player_id,
-            analyzed_at=datetime.utcnow(),
-            time_range=time_range,
-            decision_patterns=patterns,
-            learning_progress=learning_progress,
-            skill_progress=skill_progress,
-            stakeholder_analytics=stakeholder_analytics,
-            total_decisions=len(decisions),
-            current_level=game_state.current_level,
-            experience_points=game_state.experience_points
+        # Serve the pre-serialized payload without revalidating it
+        return Response(
+            content=cache.decompress(cached_analytics),
+            media_type="application/json"
         )
 
-        # Cache results
-        await services["cache"].set(
-            cache_key,
-            analytics.dict(),
-            ttl=3600  # 1 hour cache
-        )
-
-        return analytics
-
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error getting player analytics: {str(e)}")
+        logger.error("Error getting player analytics: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/players/{player_id}/learning", response_model=LearningProgress)
@@ -112,13 +98,10 @@ async def get_learning_progress(
 ):
     """Get detailed learning progress analysis"""
     try:
-        # Get all player decisions
-        decisions = await services["db"].get_player_decisions(player_id)
-        
-        return await analyze_learning_progress(player_id, decisions, services)
+        return await analyze_learning_progress(player_id, services)
 
     except Exception as e:
-        logger.error(f"Error analyzing learning progress: {str(e)}")
+        logger.error("Error analyzing learning progress: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/players/{player_id}/skills", response_model=SkillProgress)
@@ -134,7 +117,7 @@ async def get_skill_progress(
         return await analyze_skill_progress(player_id, decisions, services)
 
     except Exception as e:
-        logger.error(f"Error analyzing skill progress: {str(e)}")
+        logger.error("Error analyzing skill progress: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/players/{player_id}/stakeholders", response_model=StakeholderAnalytics)
@@ -144,17 +127,21 @@ async def get_stakeholder_analytics(
 ):
     """Get detailed stakeholder relationship analytics"""
     try:
-        # Get recent decisions and current game state
-        decisions = await services["db"].get_player_decisions(
-            player_id,
-            start_date=datetime.utcnow() - timedelta(days=30)
+        # Per-stakeholder impact statistics come back from one query
+        # instead of loading the decisions themselves
+        stats, game_state = await asyncio.gather(
+            services["db"].get_stakeholder_impact_stats(
+                player_id,
+                since=datetime.utcnow() - timedelta(days=30),
+                critical_threshold=CRITICAL_IMPACT_THRESHOLD
+            ),
+            get_game_state(player_id, services)
         )
-        game_state = await services["db"].get_game_state(player_id)
         
-        return analyze_stakeholder_relations(decisions, game_state)
+        return build_stakeholder_analytics(stats, game_state)
 
     except Exception as e:
-        logger.error(f"Error analyzing stakeholder relations: {str(e)}")
+        logger.error("Error analyzing stakeholder relations: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/players/{player_id}/patterns", response_model=List[DecisionPattern])
@@ -171,32 +158,105 @@ async def get_decision_patterns(
         return patterns.patterns
 
     except Exception as e:
-        logger.error(f"Error analyzing decision patterns: {str(e)}")
+        logger.error("Error analyzing decision patterns: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-async def analyze_learning_progress(
+async def compute_player_analytics(
+    player_id: str,
+    time_range: int,
+    services: dict
+) -> Optional[PlayerAnalytics]:
+    """Compute analytics for a player, or None without a game state"""
+    # Get player decisions within time range and current game state
+    start_date = datetime.utcnow() - timedelta(days=time_range)
+    decisions, game_state = await asyncio.gather(
+        services["db"].get_player_decisions(
+            player_id,
+            start_date=start_date
+        ),
+        get_game_state(player_id, services)
+    )
+    if not game_state:
+        return None
+
+    # Analyze progress concurrently, then patterns
+    learning_progress, skill_progress = await asyncio.gather(
+        analyze_learning_progress(
+            player_id,
+            services,
+            since=start_date
+        ),
+        analyze_skill_progress(
+            player_id,
+            decisions,
+            services
+        )
+    )
+    patterns = services["pattern_analyzer"].analyze_patterns(decisions)
+    stakeholder_analytics = analyze_stakeholder_relations(
+        decisions,
+        game_state
+    )
+
+    return PlayerAnalytics(
+        player_id=player_id,
+        analyzed_at=datetime.utcnow(),
+        time_range=time_range,
+        decision_patterns=patterns,
+        learning_progress=learning_progress,
+        skill_progress=skill_progress,
+        stakeholder_analytics=stakeholder_analytics,
+        total_decisions=len(decisions),
+        current_level=game_state.current_level,
+        experience_points=game_state.experience_points
+    )
+
+async def get_game_state(
     player_id: str,
-    decisions: List[dict],
     services: dict
+) -> Optional[GameState]:
+    """Get player's game state, reading through the game state cache"""
+    async def load_state() -> Optional[dict]:
+        state = await services["db"].get_game_state(player_id)
+        return state.model_dump(mode="json") if state else None
+
+    cached_state = await services["cache"].get_or_load_game_state(
+        player_id,
+        load_state
+    )
+    return GameState.model_validate(cached_state) if cached_state else None
+
+async def analyze_learning_progress(
+    player_id: str,
+    services: dict,
+    since: Optional[datetime] = None
 ) -> LearningProgress:
     """Analyze player's learning progress"""
     try:
-        # Get achievements and completed scenarios
-        achievements = await services["db"].get_player_achievements(player_id)
-        completed_scenarios = await services["db"].get_completed_scenarios(player_id)
-
-        # Calculate metrics
-        if decisions:
-            recent_decisions = sorted(decisions, key=lambda x: x['timestamp'])[-10:]
-            avg_score = sum(d['success_rating'] for d in recent_decisions) / len(recent_decisions)
-            improvement_rate = calculate_improvement_rate(decisions)
+        # Get achievements, completed scenarios and aggregate decision
+        # metrics concurrently. Without a time bound the metrics come from
+        # the rollups kept on the player row instead of a decision scan.
+        achievements, completed_scenarios, stats = await asyncio.gather(
+            services["db"].get_player_achievements(player_id),
+            services["db"].get_completed_scenarios(player_id),
+            services["db"].get_player_decision_stats(player_id, since=since)
+        )
+
+        if stats["total_count"]:
+            avg_score = stats["avg_recent_success"]
+            improvement_rate = calculate_improvement_rate_from_averages(
+                stats["avg_early_window_success"],
+                stats["avg_recent_window_success"]
+            ) if stats["total_count"] >= 2 else 0.0
+            current_challenges = stats["recent_challenge_categories"]
         else:
             avg_score = 0
             improvement_rate = 0
+            current_challenges = ["No decision history available"]
 
         return LearningProgress(
             mastered_concepts=[ach.concept for ach in achievements if ach.type == 'mastery'],
-            current_challenges=identify_current_challenges(decisions),
+            current_challenges=current_challenges,
             improvement_rate=improvement_rate,
             avg_success_rate=avg_score,
             completed_scenarios_count=len(completed_scenarios),
@@ -207,7 +267,7 @@ async def analyze_learning_progress(
         )
 
     except Exception as e:
-        logger.error(f"Error in learning progress analysis: {str(e)}")
+        logger.error("Error in learning progress analysis: %s", e)
         raise
 
 async def analyze_skill_progress(
@@ -232,7 +292,7 @@ async def analyze_skill_progress(
         )
 
     except Exception as e:
-        logger.error(f"Error in skill progress analysis: {str(e)}")
+        logger.error("Error in skill progress analysis: %s", e)
         raise
 
 def analyze_stakeholder_relations(
@@ -241,66 +301,81 @@ def analyze_stakeholder_relations(
 ) -> StakeholderAnalytics:
     """Analyze stakeholder relationship patterns"""
     try:
-        stakeholder_impacts = {}
-        for stakeholder in game_state.stakeholder_satisfaction.keys():
-            stakeholder_impacts[stakeholder] = {
-                'current_satisfaction': game_state.stakeholder_satisfaction[stakeholder],
-                'trend': calculate_stakeholder_trend(decisions, stakeholder),
-                'critical_events': identify_critical_events(decisions, stakeholder),
-                'relationship_strength': calculate_relationship_strength(
-                    decisions,
-                    stakeholder,
-                    game_state
-                )
+        satisfaction = game_state.stakeholder_satisfaction
+        impacts_by_stakeholder = {stakeholder: [] for stakeholder in satisfaction}
+        trend_accum = {stakeholder: deque(maxlen=3) for stakeholder in satisfaction}
+        critical_events = {stakeholder: [] for stakeholder in satisfaction}
+
+        # Single pass over decisions, fanning impacts out per stakeholder
+        for d in decisions:
+            impacts = d['impacts']
+            for stakeholder in d['stakeholders_affected']:
+                if stakeholder not in impacts_by_stakeholder:
+                    continue
+                impact = impacts[stakeholder]
+                impacts_by_stakeholder[stakeholder].append(impact)
+                trend_accum[stakeholder].append(impact)
+                if abs(impact) >= CRITICAL_IMPACT_THRESHOLD:
+                    critical_events[stakeholder].append({
+                        'decision_id': d.get('id'),
+                        'timestamp': d['timestamp'],
+                        'impact': impact
+                    })
+
+        stats = {
+            stakeholder: {
+                'avg_impact': sum(impacts) / len(impacts) if impacts else None,
+                'trend': (
+                    sum(trend_accum[stakeholder]) / len(trend_accum[stakeholder])
+                    if trend_accum[stakeholder] else 0.0
+                ),
+                'critical_events': critical_events[stakeholder]
             }
-
-        return StakeholderAnalytics(
-            stakeholder_impacts=stakeholder_impacts,
-            balanced_score=calculate_stakeholder_balance(stakeholder_impacts),
-            critical_relationships=identify_critical_relationships(stakeholder_impacts),
-            improvement_opportunities=identify_stakeholder_opportunities(
-                stakeholder_impacts,
-                game_state
-            )
-        )
+            for stakeholder, impacts in impacts_by_stakeholder.items()
+        }
+        return build_stakeholder_analytics(stats, game_state)
 
     except Exception as e:
-        logger.error(f"Error in stakeholder analysis: {str(e)}")
+        logger.error("Error in stakeholder analysis: %s", e)
         raise
 
+def build_stakeholder_analytics(
+    stats: Dict[str, dict],
+    game_state: dict
+) -> StakeholderAnalytics:
+    """Build stakeholder analytics from per-stakeholder impact statistics"""
+    stakeholder_impacts = {}
+    for stakeholder, current in game_state.stakeholder_satisfaction.items():
+        stakeholder_stats = stats.get(stakeholder, {})
+        stakeholder_impacts[stakeholder] = {
+            'current_satisfaction': current,
+            'trend': stakeholder_stats.get('trend') or 0.0,
+            'critical_events': stakeholder_stats.get('critical_events') or [],
+            'relationship_strength': calculate_relationship_strength(
+                stakeholder_stats.get('avg_impact'),
+                current
+            )
+        }
+
+    return StakeholderAnalytics(
+        stakeholder_impacts=stakeholder_impacts,
+        balanced_score=calculate_stakeholder_balance(stakeholder_impacts),
+        critical_relationships=identify_critical_relationships(stakeholder_impacts),
+        improvement_opportunities=identify_stakeholder_opportunities(
+            stakeholder_impacts,
+            game_state
+        )
+    )
+
 # Helper functions for analysis
 
-def calculate_improvement_rate(decisions: List[dict]) -> float:
-    """Calculate player's rate of improvement"""
-    if len(decisions) < 2:
-        return 0.0
-        
-    sorted_decisions = sorted(decisions, key=lambda x: x['timestamp'])
-    window_size = min(10, len(sorted_decisions) // 2)
-    
-    early_window = sorted_decisions[:window_size]
-    recent_window = sorted_decisions[-window_size:]
-    
-    early_avg = sum(d['success_rating'] for d in early_window) / window_size
-    recent_avg = sum(d['success_rating'] for d in recent_window) / window_size
-    
+def calculate_improvement_rate_from_averages(
+    early_avg: float,
+    recent_avg: float
+) -> float:
+    """Calculate relative improvement between early and recent averages"""
     return (recent_avg - early_avg) / early_avg if early_avg > 0 else 0.0
 
-def identify_current_challenges(decisions: List[dict]) -> List[str]:
-    """Identify areas where player is currently struggling"""
-    if not decisions:
-        return ["No decision history available"]
-        
-    recent_decisions = sorted(decisions, key=lambda x: x['timestamp'])[-5:]
-    challenges = []
-    
-    # Analyze recent performance areas
-    for decision in recent_decisions:
-        if decision['success_rating'] < 70:
-            challenges.append(decision['category'])
-            
-    return list(set(challenges))
-
 def calculate_learning_path_progress(
     completed_scenarios: List[dict],
     settings: Settings
@@ -331,21 +406,15 @@ def identify_skill_gaps(skill_levels: Dict[str, float]) -> List[str]:
         if level < 0.7  # Below 70% proficiency
     ]
 
-def calculate_stakeholder_trend(
-    decisions: List[dict],
-    stakeholder: str
+def calculate_relationship_strength(
+    avg_impact: Optional[float],
+    current_satisfaction: float
 ) -> float:
-    """Calculate trend in stakeholder relationship"""
-    if not decisions:
-        return 0.0
-        
-    stakeholder_decisions = [
-        d for d in decisions
-        if stakeholder in d['stakeholders_affected']
-    ]
-    
-    if not stakeholder_decisions:
-        return 0.0
-        
-    recent = stakeholder_decisions[-3:]  # Last 3 decisions
-    return sum(d['impacts'][stakeholder] for d in recent) / len(recent)
\ No newline at end of file
+    """Calculate relationship strength from satisfaction and average impact"""
+    satisfaction_score = current_satisfaction / 100
+    if avg_impact is None:
+        return satisfaction_score
+
+    # Normalize average impact from -100..100 to 0..1
+    impact_score = (avg_impact + 100) / 200
+    return 0.7 * satisfaction_score + 0.3 * impact_score
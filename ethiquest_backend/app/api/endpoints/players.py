@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Response
 from typing import List, Optional
 import logging
 from datetime import datetime
@@ -23,7 +23,7 @@ async def get_services(
     pattern_analyzer: PatternAnalyzer = Depends(PatternAnalyzer.get_instance),
     ai_service: AIService = Depends(AIService.get_instance),
 ):
-    game_logic = GameLogic(settings, pattern_analyzer)
+    game_logic = GameLogic.get_instance(settings, pattern_analyzer)
     return {
         "db": db,
         "cache": cache,
@@ -71,13 +71,13 @@ async def create_player(
         # Cache player data
         await services["cache"].set_player(
             created_player.id,
-            created_player.dict()
+            created_player.model_dump_json().encode()
         )
         
         return created_player
         
     except Exception as e:
-        logger.error(f"Error creating player: {str(e)}")
+        logger.error("Error creating player: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{player_id}", response_model=Player)
@@ -87,28 +87,29 @@ async def get_player(
 ):
     """Get player details"""
     try:
-        # Check cache first
-        cached_player = await services["cache"].get_player(player_id)
-        if cached_player:
-            return Player(**cached_player)
-        
-        # Get from database
-        player = await services["db"].get_player(player_id)
-        if not player:
+        async def load_player() -> Optional[bytes]:
+            player = await services["db"].get_player(player_id)
+            return player.model_dump_json().encode() if player else None
+        
+        # Read through the cache; concurrent misses share one DB load and
+        # unknown ids are negatively cached
+        cached_player = await services["cache"].get_or_load(
+            f"player:{player_id}",
+            load_player
+        )
+        if cached_player is None:
             raise HTTPException(
                 status_code=404,
                 detail="Player not found"
             )
         
-        # Update cache
-        await services["cache"].set_player(player_id, player.dict())
-        
-        return player
+        # Serve the stored JSON without revalidating it
+        return Response(content=cached_player, media_type="application/json")
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error retrieving player: {str(e)}")
+        logger.error("Error retrieving player: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/{player_id}", response_model=Player)
@@ -141,7 +142,7 @@ async def update_player(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error updating player: {str(e)}")
+        logger.error("Error updating player: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{player_id}/state", response_model=GameState)
@@ -151,28 +152,27 @@ async def get_player_state(
 ):
     """Get player's current game state"""
     try:
-        # Check cache first
-        cached_state = await services["cache"].get_game_state(player_id)
-        if cached_state:
-            return GameState(**cached_state)
+        async def load_state() -> Optional[dict]:
+            state = await services["db"].get_game_state(player_id)
+            return state.model_dump(mode="json") if state else None
         
-        # Get from database
-        state = await services["db"].get_game_state(player_id)
-        if not state:
+        # Read through the cache with coalesced loads
+        cached_state = await services["cache"].get_or_load_game_state(
+            player_id,
+            load_state
+        )
+        if cached_state is None:
             raise HTTPException(
                 status_code=404,
                 detail="Game state not found"
             )
         
-        # Update cache
-        await services["cache"].set_game_state(player_id, state.dict())
-        
-        return state
+        return GameState.model_validate(cached_state)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error retrieving game state: {str(e)}")
+        logger.error("Error retrieving game state: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{player_id}/statistics")
@@ -201,7 +201,7 @@ async def get_player_statistics(
         }
         
     except Exception as e:
-        logger.error(f"Error retrieving player statistics: {str(e)}")
+        logger.error("Error retrieving player statistics: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 async def initialize_player_game_state(
@@ -219,11 +219,11 @@ async def initialize_player_game_state(
         # Cache game state
         await services["cache"].set_game_state(
             player.id,
-            initial_state.dict()
+            initial_state.model_dump(mode="json")
         )
         
-        logger.info(f"Initialized game state for player {player.id}")
+        logger.info("Initialized game state for player %s", player.id)
         
     except Exception as e:
-        logger.error(f"Error initializing game state: {str(e)}")
+        logger.error("Error initializing game state: %s", e)
         # Could implement retry logic or notification system here
\ No newline at end of file
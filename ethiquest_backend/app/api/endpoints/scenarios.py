@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
+from typing import List, Optional, Tuple, FrozenSet
+import asyncio
 import logging
+import time
 from datetime import datetime
+from cachetools import LRUCache
 
 from ...core.game.game_logic import GameLogic
 from ...core.ai.scenario_generator import ScenarioGenerator
@@ -13,28 +16,44 @@ from ...models.scenario import (
 )
 from ...models.game_state import GameState
 from ...services.db_service import DBService
+from ...services.analytics_queue import AnalyticsQueue
 from ...core.cache.cache_service import CacheService
 from ...core.analytics.pattern_analyzer import PatternAnalyzer
+from ...core.ai.ai_service import AIService
 from ...config import Settings, get_settings
 
 router = APIRouter(prefix="/scenarios", tags=["scenarios"])
 logger = logging.getLogger(__name__)
 
+# Per-scenario lookup sets used by decision validation
+_scenario_indexes = LRUCache(maxsize=1024)
+
+def _cache_day() -> int:
+    """Current UTC day number, for keys of day-scoped cache entries"""
+    # Integer division of the epoch clock; no datetime or strftime
+    return int(time.time()) // 86400
+
 # Dependency injection
 async def get_services(
     settings: Settings = Depends(get_settings),
     db: DBService = Depends(DBService.get_instance),
     cache: CacheService = Depends(CacheService.get_instance),
     pattern_analyzer: PatternAnalyzer = Depends(PatternAnalyzer.get_instance),
+    ai_service: AIService = Depends(AIService.get_instance),
+    analytics_queue: AnalyticsQueue = Depends(AnalyticsQueue.get_instance),
 ):
-    game_logic = GameLogic(settings, pattern_analyzer)
-    scenario_generator = ScenarioGenerator(settings, pattern_analyzer)
+    game_logic = GameLogic.get_instance(settings, pattern_analyzer)
+    scenario_generator = ScenarioGenerator.get_instance(
+        ai_service,
+        pattern_analyzer
+    )
     return {
         "db": db,
         "cache": cache,
         "game_logic": game_logic,
         "scenario_generator": scenario_generator,
-        "pattern_analyzer": pattern_analyzer
+        "pattern_analyzer": pattern_analyzer,
+        "analytics_queue": analytics_queue
     }
 
 @router.get("/generate", response_model=ScenarioResponse)
@@ -45,22 +64,30 @@ async def generate_scenario(
 ):
     """Generate a new scenario for the player"""
     try:
-        # Check cache first
-        cache_key = f"scenario:{player_id}:{datetime.utcnow().strftime('%Y%m%d')}"
-        cached_scenario = await services["cache"].get_scenario(cache_key)
+        # Check cache first; the entry is scoped to the player so their
+        # decisions invalidate it
+        cache_key = f"daily:{_cache_day()}"
+        cached_scenario = await services["cache"].get_scenario_raw(
+            cache_key,
+            player_id=player_id
+        )
         if cached_scenario:
-            return ScenarioResponse(**cached_scenario)
+            # Serve the pre-serialized payload without revalidating it
+            return Response(
+                content=cached_scenario,
+                media_type="application/json"
+            )
 
-        # Get player's game state and history
-        game_state = await services["db"].get_game_state(player_id)
+        # Get player's game state and decision history concurrently
+        game_state, decisions = await asyncio.gather(
+            services["db"].get_game_state(player_id),
+            services["db"].get_player_decisions(player_id)
+        )
         if not game_state:
             raise HTTPException(
                 status_code=404,
                 detail="Player game state not found"
             )
-
-        # Get player's decision history
-        decisions = await services["db"].get_player_decisions(player_id)
         
         # Analyze patterns for personalization
         patterns = services["pattern_analyzer"].analyze_patterns(decisions)
@@ -76,18 +103,20 @@ async def generate_scenario(
         stored_scenario = await services["db"].create_scenario(scenario)
 
         # Cache scenario
-        response = ScenarioResponse(
+        payload = ScenarioResponse(
             scenario=stored_scenario,
             game_state=game_state,
             patterns=patterns
-        )
-        await services["cache"].set_scenario(
+        ).model_dump_json().encode()
+        await services["cache"].store_scenario(
             cache_key,
-            response.dict(),
-            ttl=3600  # 1 hour cache
+            payload,
+            ttl=3600,  # 1 hour cache
+            player_id=player_id
         )
 
-        return response
+        # Serve the bytes just cached rather than serializing again
+        return Response(content=payload, media_type="application/json")
 
     except Exception as e:
         logger.error(f"Error generating scenario: {str(e)}")
@@ -98,20 +127,22 @@ async def submit_decision(
     scenario_id: str,
     player_id: str,
     decision: Decision,
-    background_tasks: BackgroundTasks,
     services: dict = Depends(get_services)
 ):
     """Submit and process a player's decision"""
     try:
-        # Get scenario and game state
-        scenario = await services["db"].get_scenario(scenario_id)
+        # Get scenario and game state concurrently
+        scenario, game_state = await asyncio.gather(
+            services["db"].get_scenario(scenario_id),
+            # The state is updated below, so read it from the primary
+            services["db"].get_game_state(player_id, primary=True)
+        )
         if not scenario:
             raise HTTPException(
                 status_code=404,
                 detail="Scenario not found"
             )
 
-        game_state = await services["db"].get_game_state(player_id)
         if not game_state:
             raise HTTPException(
                 status_code=404,
@@ -125,6 +156,9 @@ async def submit_decision(
                 detail="Invalid decision for scenario"
             )
 
+        # Snapshot state fields to find what the decision changed
+        previous_fields = game_state.model_dump(mode="json")
+
         # Process decision and get impacts
         updated_state, impacts = await services["game_logic"].process_decision(
             game_state=game_state,
@@ -143,17 +177,27 @@ async def submit_decision(
         # Update game state
         await services["db"].update_game_state(player_id, updated_state)
 
-        # Invalidate caches
-        await services["cache"].delete_game_state(player_id)
-        await services["cache"].delete_player(player_id)
+        # Write only the changed game state fields through to the cache
+        # and invalidate the player and their scenarios, concurrently
+        await asyncio.gather(
+            services["cache"].update_game_state_fields(
+                player_id,
+                {
+                    field: value
+                    for field, value in updated_state.model_dump(mode="json").items()
+                    if previous_fields.get(field) != value
+                }
+            ),
+            services["cache"].delete_player(player_id),
+            services["cache"].invalidate_player_scenarios(player_id)
+        )
 
-        # Schedule background analytics
-        background_tasks.add_task(
-            process_decision_analytics,
+        # Hand analytics to the worker pool; the job survives restarts
+        # and is retried on failure
+        await services["analytics_queue"].enqueue_decision_analytics(
             player_id=player_id,
-            decision=stored_decision,
-            impacts=impacts,
-            services=services
+            decision_id=str(stored_decision.id),
+            impacts=impacts
         )
 
         return DecisionResponse(
@@ -209,13 +253,26 @@ async def get_scenario_analysis(
         logger.error(f"Error analyzing scenario: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _get_scenario_indexes(
+    scenario: Scenario
+) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """Get valid approach ids and required parameters of a scenario as sets"""
+    # Stored scenarios don't change, so their id identifies the sets
+    indexes = _scenario_indexes.get(scenario.id)
+    if indexes is None:
+        indexes = (
+            frozenset(approach.id for approach in scenario.possible_approaches),
+            frozenset(scenario.required_parameters)
+        )
+        _scenario_indexes[scenario.id] = indexes
+    return indexes
+
 def _validate_decision(decision: Decision, scenario: Scenario) -> bool:
     """Validate if decision is valid for the scenario"""
     try:
+        valid_approaches, required_parameters = _get_scenario_indexes(scenario)
+
         # Check if decision approach is valid for scenario
-        valid_approaches = [
-            approach.id for approach in scenario.possible_approaches
-        ]
         if decision.approach_id not in valid_approaches:
             return False
 
@@ -228,57 +285,10 @@ def _validate_decision(decision: Decision, scenario: Scenario) -> bool:
                 return False
 
         # Validate decision parameters
-        if not all(
-            param in scenario.required_parameters
-            for param in decision.parameters.keys()
-        ):
+        if not decision.parameters.keys() <= required_parameters:
             return False
 
         return True
 
     except Exception:
         return False
-
-async def process_decision_analytics(
-    player_id: str,
-    decision: Decision,
-    impacts: dict,
-    services: dict
-):
-    """Process analytics after decision submission"""
-    try:
-        # Get player's decision history
-        decisions = await services["db"].get_player_decisions(player_id)
-        
-        # Update player patterns
-        patterns = services["pattern_analyzer"].analyze_patterns(decisions)
-        await services["db"].update_player_patterns(player_id, patterns)
-
-        # Check for achievements
-        achievements = services["game_logic"].check_achievements(
-            player_id=player_id,
-            decision=decision,
-            impacts=impacts,
-            patterns=patterns
-        )
-
-        # Store new achievements
-        if achievements:
-            await services["db"].create_achievements(
-                player_id=player_id,
-                achievements=achievements
-            )
-
-        # Update analytics logs
-        await services["db"].create_analytics_log(
-            player_id=player_id,
-            decision_id=decision.id,
-            patterns=patterns,
-            impacts=impacts
-        )
-
-        logger.info(f"Processed analytics for player {player_id}")
-
-    except Exception as e:
-        logger.error(f"Error processing decision analytics: {str(e)}")
-        # Could implement retry logic or notification system here
\ No newline at end of file
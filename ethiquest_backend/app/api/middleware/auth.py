@@ -1,9 +1,12 @@
 from fastapi import HTTPException, Security, Depends
 from fastapi.security import OAuth2AuthorizationCodeBearer, SecurityScopes
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, List
+from functools import lru_cache
 import logging
+import time
+from cachetools import TTLCache
 
 from ...models.auth import TokenData, User
 from ...services.db_service import DBService
@@ -12,6 +15,17 @@ from ...config import Settings, get_settings
 
 logger = logging.getLogger(__name__)
 
+# Per-process memoization of token checks. A revoked token is rejected by
+# other workers once its blacklist miss expires here.
+TOKEN_CACHE_SIZE = 4096
+TOKEN_PAYLOAD_TTL = 60
+BLACKLIST_MISS_TTL = 5
+
+oauth2_scheme = OAuth2AuthorizationCodeBearer(
+    authorizationUrl="auth/authorize",
+    tokenUrl="auth/token"
+)
+
 class AuthHandler:
     """Handles authentication and authorization logic"""
     
@@ -19,11 +33,42 @@ class AuthHandler:
         self.secret_key = settings.SECRET_KEY
         self.algorithm = settings.ALGORITHM
         self.access_token_expire_minutes = settings.ACCESS_TOKEN_EXPIRE_MINUTES
-        self.oauth2_scheme = OAuth2AuthorizationCodeBearer(
-            authorizationUrl="auth/authorize",
-            tokenUrl="auth/token"
+        # Parse the key once; jose accepts a prepared Key for sign and verify
+        self._key = jwk.construct(self.secret_key, self.algorithm)
+        self.oauth2_scheme = oauth2_scheme
+        self._payload_cache = TTLCache(
+            maxsize=TOKEN_CACHE_SIZE,
+            ttl=TOKEN_PAYLOAD_TTL
+        )
+        self._not_blacklisted = TTLCache(
+            maxsize=TOKEN_CACHE_SIZE,
+            ttl=BLACKLIST_MISS_TTL
         )
 
+    def _decode_payload(self, token: str) -> dict:
+        """Decode and verify token, reusing recent verifications"""
+        payload = self._payload_cache.get(token)
+        # Re-decode expired payloads so jwt.decode raises the usual error
+        if payload is None or payload.get("exp", 0) <= time.time():
+            payload = jwt.decode(
+                token,
+                self._key,
+                algorithms=[self.algorithm]
+            )
+            self._payload_cache[token] = payload
+        return payload
+
+    async def _is_blacklisted(self, token: str, cache: CacheService) -> bool:
+        """Check token blacklist, skipping Redis for recently checked tokens"""
+        if token in self._not_blacklisted:
+            return False
+        
+        if await cache.get(f"blacklist:{token}"):
+            return True
+        
+        self._not_blacklisted[token] = True
+        return False
+
     async def create_access_token(
         self,
         data: dict,
@@ -42,7 +87,7 @@ class AuthHandler:
         try:
             encoded_jwt = jwt.encode(
                 to_encode,
-                self.secret_key,
+                self._key,
                 algorithm=self.algorithm
             )
             return encoded_jwt
@@ -70,19 +115,14 @@ class AuthHandler:
 
         try:
             # Check token blacklist in cache
-            is_blacklisted = await cache.get(f"blacklist:{token}")
-            if is_blacklisted:
+            if await self._is_blacklisted(token, cache):
                 raise HTTPException(
                     status_code=401,
                     detail="Token has been revoked"
                 )
 
             # Decode token
-            payload = jwt.decode(
-                token,
-                self.secret_key,
-                algorithms=[self.algorithm]
-            )
+            payload = self._decode_payload(token)
             
             user_id: str = payload.get("sub")
             if user_id is None:
@@ -93,12 +133,11 @@ class AuthHandler:
 
             # Verify scopes
             token_scopes = payload.get("scopes", [])
-            for scope in security_scopes.scopes:
-                if scope not in token_scopes:
-                    raise HTTPException(
-                        status_code=403,
-                        detail="Not enough permissions"
-                    )
+            if not set(token_scopes).issuperset(security_scopes.scopes):
+                raise HTTPException(
+                    status_code=403,
+                    detail="Not enough permissions"
+                )
 
             return TokenData(
                 user_id=user_id,
@@ -155,7 +194,7 @@ class AuthHandler:
             # Decode token to get expiration
             payload = jwt.decode(
                 token,
-                self.secret_key,
+                self._key,
                 algorithms=[self.algorithm]
             )
             
@@ -170,6 +209,10 @@ class AuthHandler:
                     True,
                     ttl=int(ttl)
                 )
+            
+            # Drop local memoization so this worker rejects it immediately
+            self._payload_cache.pop(token, None)
+            self._not_blacklisted.pop(token, None)
         except Exception as e:
             logger.error(f"Error revoking token: {str(e)}")
             raise HTTPException(
@@ -191,11 +234,29 @@ class PermissionChecker:
         return 'admin' in user.roles
 
 # Dependencies for route protection
-auth_handler = AuthHandler(get_settings())
+@lru_cache(maxsize=1)
+def get_auth_handler() -> AuthHandler:
+    """Create the shared auth handler on first use"""
+    return AuthHandler(get_settings())
+
+async def get_current_user(
+    security_scopes: SecurityScopes,
+    token: str = Depends(oauth2_scheme),
+    auth_handler: AuthHandler = Depends(get_auth_handler),
+    db: DBService = Depends(DBService.get_instance),
+    cache: CacheService = Depends(CacheService.get_instance)
+) -> User:
+    """Dependency for getting current authenticated user"""
+    return await auth_handler.get_current_user(
+        security_scopes,
+        token,
+        db,
+        cache
+    )
 
 async def get_current_active_user(
     security_scopes: SecurityScopes,
-    current_user: User = Depends(auth_handler.get_current_user)
+    current_user: User = Depends(get_current_user)
 ) -> User:
     """Dependency for getting current active user"""
     if not current_user.is_active:
@@ -1,8 +1,9 @@
 from fastapi import Request, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
 from typing import Any, Dict, Optional
+from functools import lru_cache
 import logging
 import traceback
 import sys
@@ -20,11 +21,13 @@ class APIError(Exception):
         self,
         message: str,
         code: int = status.HTTP_500_INTERNAL_SERVER_ERROR,
-        details: Optional[Dict[str, Any]] = None
+        details: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None
     ):
         self.message = message
         self.code = code
         self.details = details or {}
+        self.headers = headers
         super().__init__(message)
 
 class ErrorHandler:
@@ -34,11 +37,40 @@ class ErrorHandler:
         self.settings = settings
         self.include_details = settings.ENVIRONMENT != "production"
 
+    def _wants_traceback(self) -> bool:
+        """Whether tracebacks are worth formatting for this environment"""
+        return self.include_details or logger.isEnabledFor(logging.DEBUG)
+
+    def _log_exception(
+        self,
+        label: str,
+        exc: Exception,
+        context: Dict[str, Any]
+    ) -> None:
+        """Log an error, with its traceback only outside production"""
+        if self._wants_traceback():
+            # exc_info defers traceback formatting to the log handler
+            logger.error(
+                "%s: %s\nContext: %s",
+                label,
+                exc,
+                context,
+                exc_info=exc
+            )
+        else:
+            logger.error(
+                "%s: %s %r\nContext: %s",
+                label,
+                exc.__class__.__name__,
+                exc,
+                context
+            )
+
     async def handle_error(
         self,
         request: Request,
         exc: Exception
-    ) -> JSONResponse:
+    ) -> ORJSONResponse:
         """Handle different types of errors and return appropriate responses"""
         
         # Initialize error context
@@ -65,7 +97,7 @@ class ErrorHandler:
         self,
         exc: APIError,
         context: Dict[str, Any]
-    ) -> JSONResponse:
+    ) -> ORJSONResponse:
         """Handle custom API errors"""
         response = {
             "error": {
@@ -78,16 +110,17 @@ class ErrorHandler:
         if self.include_details and exc.details:
             response["error"]["details"] = exc.details
 
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=exc.code,
-            content=response
+            content=response,
+            headers=exc.headers
         )
 
     async def _handle_validation_error(
         self,
         exc: RequestValidationError,
         context: Dict[str, Any]
-    ) -> JSONResponse:
+    ) -> ORJSONResponse:
         """Handle request validation errors"""
         # Clean validation errors
         clean_errors = []
@@ -108,7 +141,7 @@ class ErrorHandler:
             }
         }
 
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             content=response
         )
@@ -117,16 +150,12 @@ class ErrorHandler:
         self,
         exc: SQLAlchemyError,
         context: Dict[str, Any]
-    ) -> JSONResponse:
+    ) -> ORJSONResponse:
         """Handle database errors"""
         error_msg = "Database error occurred"
         
         # Log the full error
-        logger.error(
-            f"Database error: {str(exc)}\n"
-            f"Context: {context}\n"
-            f"Traceback: {''.join(traceback.format_tb(exc.__traceback__))}"
-        )
+        self._log_exception("Database error", exc, context)
 
         response = {
             "error": {
@@ -142,7 +171,7 @@ class ErrorHandler:
                 "error_message": str(exc)
             }
 
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content=response
         )
@@ -151,16 +180,12 @@ class ErrorHandler:
         self,
         exc: Exception,
         context: Dict[str, Any]
-    ) -> JSONResponse:
+    ) -> ORJSONResponse:
         """Handle unexpected errors"""
         error_msg = "An unexpected error occurred"
         
         # Log the full error
-        logger.error(
-            f"Unexpected error: {str(exc)}\n"
-            f"Context: {context}\n"
-            f"Traceback: {''.join(traceback.format_tb(exc.__traceback__))}"
-        )
+        self._log_exception("Unexpected error", exc, context)
 
         response = {
             "error": {
@@ -176,7 +201,7 @@ class ErrorHandler:
                 "error_message": str(exc)
             }
 
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content=response
         )
@@ -205,17 +230,18 @@ class ErrorHandler:
             },
             "error": {
                 "type": exc.__class__.__name__,
-                "message": str(exc),
-                "traceback": traceback.format_exception(
-                    type(exc),
-                    exc,
-                    exc.__traceback__
-                )
+                "message": str(exc)
             }
         }
+        if self._wants_traceback():
+            error_log["error"]["traceback"] = traceback.format_exception(
+                type(exc),
+                exc,
+                exc.__traceback__
+            )
 
         # Log error details
-        logger.error(f"Error {error_id}: {error_log}")
+        logger.error("Error %s: %s", error_id, error_log)
 
         # If in development, print to console
         if self.settings.ENVIRONMENT == "development":
@@ -285,16 +311,20 @@ class RateLimitError(APIError):
     def __init__(
         self,
         message: str = "Rate limit exceeded",
-        details: Optional[Dict[str, Any]] = None
+        details: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None
     ):
         super().__init__(
             message,
             status.HTTP_429_TOO_MANY_REQUESTS,
-            details
+            details,
+            headers
         )
 
-# Initialize global error handler
-error_handler = ErrorHandler(get_settings())
+@lru_cache(maxsize=1)
+def get_error_handler() -> ErrorHandler:
+    """Create the shared error handler on first use"""
+    return ErrorHandler(get_settings())
 
 # Example usage in routes:
 """
@@ -1,23 +1,70 @@
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from typing import Optional, Dict, List, Tuple
+from typing import Optional, Dict, List, Mapping, Tuple
+from types import MappingProxyType
 import time
 import logging
 from datetime import datetime
-import asyncio
-from redis.asyncio import Redis
+from redis.asyncio import ConnectionPool, Redis
 
-from .error_handler import RateLimitError
+from .error_handler import RateLimitError, get_error_handler
 from ...config import Settings, get_settings
 
 logger = logging.getLogger(__name__)
 
+# Connections shared by all rate limit checks in a worker
+REDIS_MAX_CONNECTIONS = 64
+
+# Rate limit response headers, pre-encoded for direct raw header appends
+_H_LIMIT = b"x-ratelimit-limit"
+_H_REMAINING = b"x-ratelimit-remaining"
+_H_RESET = b"x-ratelimit-reset"
+_H_RESET_MS = b"x-ratelimit-reset-ms"
+_H_WINDOW = b"x-ratelimit-window"
+
 class RateLimitManager:
     """Manages rate limiting using Redis"""
 
     def __init__(self, redis: Redis, prefix: str = "ratelimit:"):
         self.redis = redis
         self.prefix = prefix
+        
+        # Increment and set the window expiry in one round trip, so a
+        # counter can never be left behind without a TTL. ARGV[1] is the
+        # time left in the window in milliseconds, so counters expire
+        # when their window ends rather than a full window after first use
+        self._incr_window = self.redis.register_script(
+            """
+            local count = redis.call('INCR', KEYS[1])
+            if count == 1 then
+                redis.call('PEXPIRE', KEYS[1], ARGV[1])
+            end
+            return count
+            """
+        )
+
+    @classmethod
+    def from_url(cls, redis_url: str) -> 'RateLimitManager':
+        """Create a manager on its own connection pool; connects lazily"""
+        pool = ConnectionPool.from_url(
+            redis_url,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            socket_keepalive=True
+        )
+        return cls(Redis(connection_pool=pool))
+
+    async def connect(self) -> None:
+        """Check the Redis connection, e.g. at application startup"""
+        try:
+            await self.redis.ping()
+            logger.info("Rate limit manager initialized successfully")
+        except Exception as e:
+            # Checks fail open until Redis is reachable
+            logger.error(f"Failed to initialize rate limit manager: {str(e)}")
+
+    async def close(self) -> None:
+        """Close Redis connection"""
+        await self.redis.close()
 
     async def check_rate_limit(
         self,
@@ -27,43 +74,44 @@ class RateLimitManager:
     ) -> Tuple[bool, Dict]:
         """
         Check if request is within rate limit
-        Returns: (is_allowed, limit_info)
+        Returns: (is_allowed, limit_info); limit_info["now"] is the
+        timestamp the check was made at, "reset_ms" the window end in ms
         """
-        redis_key = f"{self.prefix}{key}"
-        current_time = int(time.time())
-        window_start = current_time - window
-
-        async with self.redis.pipeline(transaction=True) as pipe:
-            try:
-                # Clean old requests
-                await pipe.zremrangebyscore(redis_key, 0, window_start)
-                # Count requests in window
-                await pipe.zcard(redis_key)
-                # Add current request
-                await pipe.zadd(redis_key, {str(current_time): current_time})
-                # Set expiry
-                await pipe.expire(redis_key, window)
-                
-                _, request_count, _, _ = await pipe.execute()
-
-                is_allowed = request_count <= limit
-                
-                return is_allowed, {
-                    "limit": limit,
-                    "remaining": max(0, limit - request_count),
-                    "reset": window_start + window,
-                    "window": window
-                }
-
-            except Exception as e:
-                logger.error(f"Rate limit check error: {str(e)}")
-                # On error, allow request but log issue
-                return True, {
-                    "limit": limit,
-                    "remaining": 1,
-                    "reset": window_start + window,
-                    "window": window
-                }
+        # Fixed window: one counter per key and window, expiring with it
+        now_ms = time.time_ns() // 1_000_000
+        window_ms = window * 1000
+        bucket = now_ms // window_ms
+        redis_key = f"{self.prefix}{key}:{bucket}"
+        reset_ms = (bucket + 1) * window_ms
+        current_time = now_ms // 1000
+        reset = reset_ms // 1000
+
+        try:
+            request_count = int(await self._incr_window(
+                keys=[redis_key],
+                args=[reset_ms - now_ms]
+            ))
+
+            return request_count <= limit, {
+                "limit": limit,
+                "remaining": max(0, limit - request_count),
+                "reset": reset,
+                "reset_ms": reset_ms,
+                "window": window,
+                "now": current_time
+            }
+
+        except Exception as e:
+            logger.error(f"Rate limit check error: {str(e)}")
+            # On error, allow request but log issue
+            return True, {
+                "limit": limit,
+                "remaining": 1,
+                "reset": reset,
+                "reset_ms": reset_ms,
+                "window": window,
+                "now": current_time
+            }
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
     """Rate limiting middleware"""
@@ -71,6 +119,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     def __init__(
         self,
         app,
+        rate_limit_manager: Optional[RateLimitManager] = None,
         redis_url: Optional[str] = None,
         limit: int = 60,
         window: int = 60,
@@ -81,20 +130,24 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         self.redis_url = redis_url or self.settings.REDIS_URL
         self.limit = limit
         self.window = window
-        self.exempted_paths = set(exempted_paths or [])
-        self.rate_limit_manager = None
-        self._setup_task = None
-
-    async def setup(self):
-        """Initialize rate limit manager"""
-        try:
-            redis = Redis.from_url(self.redis_url, decode_responses=True)
-            await redis.ping()
-            self.rate_limit_manager = RateLimitManager(redis)
-            logger.info("Rate limit manager initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize rate limit manager: {str(e)}")
-            self.rate_limit_manager = None
+        # Headers that are the same on every response
+        self._static_headers = [
+            (_H_LIMIT, str(limit).encode()),
+            (_H_WINDOW, str(window).encode())
+        ]
+        # Paths ending in "*" exempt everything under that prefix
+        exempted_paths = exempted_paths or []
+        self._exempt_exact = frozenset(
+            p for p in exempted_paths if not p.endswith("*")
+        )
+        self._exempt_prefix = tuple(
+            p[:-1] for p in exempted_paths if p.endswith("*")
+        )
+        # Built up front so dispatch never has to set anything up; the
+        # pool only connects on first use
+        self.rate_limit_manager = (
+            rate_limit_manager or RateLimitManager.from_url(self.redis_url)
+        )
 
     def get_limit_key(self, request: Request) -> str:
         """Generate rate limit key based on request"""
@@ -121,94 +174,94 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         call_next: RequestResponseEndpoint
     ) -> Response:
         """Handle rate limiting for requests"""
-        # Initialize rate limit manager if needed
-        if not self.rate_limit_manager and not self._setup_task:
-            self._setup_task = asyncio.create_task(self.setup())
-            await self._setup_task
-
-        # Check if path is exempted
-        if request.url.path in self.exempted_paths:
-            return await call_next(request)
-
-        # Skip rate limiting if manager isn't available
-        if not self.rate_limit_manager:
-            logger.warning("Rate limit manager not available, skipping check")
+        # Check if path is exempted; the scope path needs no URL parsing
+        path = request.scope["path"]
+        if path in self._exempt_exact or path.startswith(self._exempt_prefix):
             return await call_next(request)
 
-        try:
-            # Get rate limit key
-            limit_key = self.get_limit_key(request)
-            
-            # Check rate limit
-            is_allowed, limit_info = await self.rate_limit_manager.check_rate_limit(
-                limit_key,
-                self.limit,
-                self.window
-            )
+        # check_rate_limit handles Redis errors itself (failing open), so
+        # no try is needed here; errors from the downstream app propagate
+        # to the usual handlers untouched
+        limit_key = self.get_limit_key(request)
+        is_allowed, limit_info = await self.rate_limit_manager.check_rate_limit(
+            limit_key,
+            self.limit,
+            self.window
+        )
 
-            # Add rate limit headers
-            headers = {
-                "X-RateLimit-Limit": str(limit_info["limit"]),
-                "X-RateLimit-Remaining": str(limit_info["remaining"]),
-                "X-RateLimit-Reset": str(limit_info["reset"]),
-                "X-RateLimit-Window": str(limit_info["window"])
-            }
-
-            if not is_allowed:
-                raise RateLimitError(
-                    details={
-                        "retry_after": limit_info["reset"] - int(time.time())
+        if not is_allowed:
+            retry_after = limit_info["reset"] - limit_info["now"]
+            # The limit headers computed by the check go out with the
+            # 429 as well; this middleware sits outside the request
+            # context's error handling, so it builds the response
+            return await get_error_handler().handle_error(
+                request,
+                RateLimitError(
+                    details={"retry_after": retry_after},
+                    headers={
+                        "Retry-After": str(retry_after),
+                        "X-RateLimit-Limit": str(limit_info["limit"]),
+                        "X-RateLimit-Remaining": "0",
+                        "X-RateLimit-Reset": str(limit_info["reset"]),
+                        "X-RateLimit-Reset-Ms": str(limit_info["reset_ms"]),
+                        "X-RateLimit-Window": str(limit_info["window"])
                     }
                 )
+            )
 
-            # Process request
-            response = await call_next(request)
-            
-            # Add rate limit headers to response
-            for header, value in headers.items():
-                response.headers[header] = value
+        # Process request
+        response = await call_next(request)
+        
+        # Add rate limit headers to response, bypassing MutableHeaders
+        raw_headers = response.raw_headers
+        raw_headers.extend(self._static_headers)
+        raw_headers.append(
+            (_H_REMAINING, str(limit_info["remaining"]).encode())
+        )
+        raw_headers.append((_H_RESET, str(limit_info["reset"]).encode()))
+        raw_headers.append(
+            (_H_RESET_MS, str(limit_info["reset_ms"]).encode())
+        )
 
-            return response
-
-        except RateLimitError:
-            raise
-        except Exception as e:
-            logger.error(f"Rate limit middleware error: {str(e)}")
-            # On error, allow request but log issue
-            return await call_next(request)
+        return response
 
     async def close(self):
         """Cleanup resources"""
-        if self.rate_limit_manager and self.rate_limit_manager.redis:
-            await self.rate_limit_manager.redis.close()
+        await self.rate_limit_manager.close()
 
 class RateLimitConfig:
     """Rate limit configuration for different endpoints"""
     
-    DEFAULT = {
+    DEFAULT = MappingProxyType({
         "limit": 60,
         "window": 60
-    }
+    })
     
-    AUTH = {
+    AUTH = MappingProxyType({
         "limit": 5,
         "window": 60
-    }
+    })
     
-    API = {
+    API = MappingProxyType({
         "limit": 30,
         "window": 60
-    }
+    })
     
-    SCENARIOS = {
+    SCENARIOS = MappingProxyType({
         "limit": 10,
         "window": 60
-    }
+    })
 
     @classmethod
-    def get_config(cls, endpoint_type: str) -> Dict:
+    def get_config(cls, endpoint_type: str) -> Mapping:
         """Get rate limit config for endpoint type"""
-        return getattr(cls, endpoint_type.upper(), cls.DEFAULT)
+        return cls._BY_TYPE.get(endpoint_type.upper(), cls.DEFAULT)
+
+# Built once so lookups are a dict get rather than attribute resolution
+RateLimitConfig._BY_TYPE = {
+    name: getattr(RateLimitConfig, name)
+    for name in ("DEFAULT", "AUTH", "API", "SCENARIOS")
+}
 
 # Example usage in main.py:
 """
@@ -219,6 +272,6 @@ app.add_middleware(
     RateLimitMiddleware,
     limit=RateLimitConfig.API["limit"],
     window=RateLimitConfig.API["window"],
-    exempted_paths=["/health", "/metrics"]
+    exempted_paths=["/health", "/metrics/*"]
 )
 """
\ No newline at end of file
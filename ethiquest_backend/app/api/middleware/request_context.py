@@ -0,0 +1,84 @@
+from fastapi import Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+import time
+import logging
+import itertools
+import os
+import random
+
+from .error_handler import get_error_handler
+
+logger = logging.getLogger(__name__)
+
+# Request ids are "<pid>-<counter>" in hex: unique per process without a
+# uuid4 entropy read per request; the random start keeps restarts apart
+def _reset_request_ids() -> None:
+    """Start a fresh request id sequence for the current process"""
+    global _pid_hex, _request_counter
+    _pid_hex = f"{os.getpid():x}"
+    _request_counter = itertools.count(random.getrandbits(32))
+
+_reset_request_ids()
+# Workers forked from a preloaded app must not share the parent's sequence
+os.register_at_fork(after_in_child=_reset_request_ids)
+
+def _next_request_id() -> str:
+    """Generate a request id unique within this process"""
+    return f"{_pid_hex}-{next(_request_counter):x}"
+
+class RequestContextMiddleware(BaseHTTPMiddleware):
+    """Request id, timing, error handling and logging in a single layer"""
+
+    async def dispatch(
+        self,
+        request: Request,
+        call_next: RequestResponseEndpoint
+    ) -> Response:
+        request_id = _next_request_id()
+        request.state.request_id = request_id
+        start_time = time.perf_counter_ns()
+
+        # Log request
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Request: %s %s",
+                request.method,
+                request.url.path,
+                extra={
+                    "request_id": request_id,
+                    "client_host": request.client.host if request.client else None,
+                    "user_agent": request.headers.get("user-agent")
+                }
+            )
+
+        try:
+            response = await call_next(request)
+        except Exception as exc:
+            logger.error(
+                "Error: %s",
+                exc,
+                extra={
+                    "request_id": request_id,
+                    "error_type": exc.__class__.__name__
+                }
+            )
+            response = await get_error_handler().handle_error(request, exc)
+
+        # Fixed-precision milliseconds rather than a float repr of seconds
+        process_time = f"{(time.perf_counter_ns() - start_time) / 1_000_000:.3f}ms"
+        response.headers["X-Request-ID"] = request_id
+        response.headers["X-Process-Time"] = process_time
+
+        # Log response
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Response: %s",
+                response.status_code,
+                extra={
+                    "request_id": request_id,
+                    "status_code": response.status_code,
+                    "process_time": process_time
+                }
+            )
+
+        return response
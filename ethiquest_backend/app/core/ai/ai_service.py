@@ -1,15 +1,57 @@
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Callable, Awaitable
 import asyncio
+import hashlib
 import logging
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 
+import orjson
+from cachetools import LRUCache, TTLCache
 import openai
-from anthropic import Anthropic
-from tenacity import retry, stop_after_attempt, wait_exponential
+import anthropic
+from anthropic import AsyncAnthropic
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential
+)
+
+from .prompt_templates import SCENARIO_SYSTEM_PROMPT
 
 logger = logging.getLogger(__name__)
 
+# Fields every AI scenario response must contain
+_REQUIRED_FIELDS = frozenset({
+    'scenario_title',
+    'description',
+    'stakeholders_affected',
+    'approaches'
+})
+
+# Provider calls allowed in flight at once, per provider
+PROVIDER_MAX_CONCURRENT = 8
+
+# Times a call waits out a 429 before giving up
+MAX_RATE_LIMIT_WAITS = 3
+
+# Seconds to wait after a 429 without a usable Retry-After header
+DEFAULT_RETRY_AFTER = 5.0
+
+# Parsed scenarios kept in process, by prompt digest
+RESPONSE_CACHE_SIZE = 512
+
+# Seconds a prompt whose AI response could not be parsed is refused
+MALFORMED_RESPONSE_TTL = 5
+
+def _retry_after(error: Exception) -> float:
+    """Seconds to back off for a 429, from its Retry-After header"""
+    try:
+        return float(error.response.headers["retry-after"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
 @dataclass
 class AIResponse:
     """Structured response from AI service"""
@@ -23,30 +65,86 @@ class AIResponse:
 
 class AIProvider(ABC):
     """Abstract base class for AI providers"""
+
+    # Provider exception raised for HTTP 429
+    rate_limit_error = ()
+
+    def __init__(self, max_concurrent: int = PROVIDER_MAX_CONCURRENT):
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._rate_limited_until = 0.0
+
+    async def _call(self, request: Callable[[], Awaitable]):
+        """
+        Run a provider request behind the concurrency gate. A 429 pauses
+        every call to this provider for its Retry-After period instead of
+        each caller backing off and retrying on its own.
+        """
+        async with self._semaphore:
+            for _ in range(MAX_RATE_LIMIT_WAITS):
+                delay = self._rate_limited_until - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    return await request()
+                except self.rate_limit_error as e:
+                    self._rate_limited_until = max(
+                        self._rate_limited_until,
+                        time.monotonic() + _retry_after(e)
+                    )
+            
+            # Last attempt; a further 429 goes to the caller
+            delay = self._rate_limited_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return await request()
     
     @abstractmethod
-    async def generate_completion(self, prompt: str) -> str:
+    async def generate_completion(
+        self,
+        prompt: str,
+        system: Optional[str] = None
+    ) -> str:
         """Generate completion from AI provider"""
         pass
 
 class OpenAIProvider(AIProvider):
     """OpenAI integration"""
     
+    rate_limit_error = openai.RateLimitError
+
     def __init__(self, api_key: str, model: str = "gpt-4"):
+        super().__init__()
+        # Must be the async client: the sync one blocks the event loop
+        # for the whole API call
         self.client = openai.AsyncOpenAI(api_key=api_key)
         self.model = model
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=10))
-    async def generate_completion(self, prompt: str) -> str:
+    # Only network errors and 5xx are retried; 429s are handled by _call
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(min=1, max=10),
+        retry=retry_if_exception_type(
+            (openai.APIConnectionError, openai.InternalServerError)
+        )
+    )
+    async def generate_completion(
+        self,
+        prompt: str,
+        system: Optional[str] = None
+    ) -> str:
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert in business ethics and scenario design."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=2000
+            # OpenAI caches long repeated prefixes automatically; the
+            # system message goes first so it is that prefix
+            response = await self._call(
+                lambda: self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system or "You are an expert in business ethics and scenario design."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.7,
+                    max_tokens=2000
+                )
             )
             return response.choices[0].message.content
         except Exception as e:
@@ -56,20 +154,49 @@ class OpenAIProvider(AIProvider):
 class AnthropicProvider(AIProvider):
     """Anthropic Claude integration"""
     
+    rate_limit_error = anthropic.RateLimitError
+
     def __init__(self, api_key: str):
-        self.client = Anthropic(api_key=api_key)
+        super().__init__()
+        # Must be the async client: the sync one blocks the event loop
+        # for the whole API call
+        self.client = AsyncAnthropic(api_key=api_key)
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=10))
-    async def generate_completion(self, prompt: str) -> str:
+    # Only network errors and 5xx are retried; 429s are handled by _call
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(min=1, max=10),
+        retry=retry_if_exception_type(
+            (anthropic.APIConnectionError, anthropic.InternalServerError)
+        )
+    )
+    async def generate_completion(
+        self,
+        prompt: str,
+        system: Optional[str] = None
+    ) -> str:
+        # Mark the system prompt as a cache breakpoint so repeated
+        # requests read it from the provider's prompt cache
+        extra = {}
+        if system:
+            extra["system"] = [{
+                "type": "text",
+                "text": system,
+                "cache_control": {"type": "ephemeral"}
+            }]
+        
         try:
-            response = await self.client.messages.create(
-                model="claude-3-opus-20240229",
-                max_tokens=2000,
-                temperature=0.7,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
+            response = await self._call(
+                lambda: self.client.messages.create(
+                    model="claude-3-opus-20240229",
+                    max_tokens=2000,
+                    temperature=0.7,
+                    **extra,
+                    messages=[{
+                        "role": "user",
+                        "content": prompt
+                    }]
+                )
             )
             return response.content[0].text
         except Exception as e:
@@ -88,19 +215,82 @@ class AIService:
         self.primary_provider = primary_provider
         self.backup_provider = backup_provider
         self.cache_service = cache_service
+        # Generations in progress, by prompt key
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Recent responses, and prompts whose responses failed to parse
+        self._responses = LRUCache(maxsize=RESPONSE_CACHE_SIZE)
+        self._malformed = TTLCache(
+            maxsize=RESPONSE_CACHE_SIZE,
+            ttl=MALFORMED_RESPONSE_TTL
+        )
+
+    @staticmethod
+    def _prompt_key(prompt: str) -> str:
+        """Fixed-size key for a prompt of any length"""
+        return hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+
+    async def generate_scenario(
+        self,
+        prompt: str,
+        template_id: Optional[str] = None,
+        slots: Optional[Dict] = None
+    ) -> AIResponse:
+        """
+        Generate a scenario using AI. With a template id and structural
+        slot values, a scenario cached for another prompt of the same
+        shape is reused instead of calling a provider.
+        """
+        # Hot prompts are answered in process, without touching Redis
+        key = self._prompt_key(prompt)
+        response = self._responses.get(key)
+        if response is not None:
+            return response
+        if key in self._malformed:
+            raise ValueError("Invalid AI response format")
+        
+        # Concurrent calls with the same prompt share one generation.
+        # No await between lookup and insert, so no lock is needed.
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(
+                self._generate_scenario(prompt, key, template_id, slots)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(
+                lambda _: self._inflight.pop(key, None)
+            )
+        
+        # A cancelled caller must not cancel the generation for the others
+        return await asyncio.shield(task)
 
-    async def generate_scenario(self, prompt: str) -> AIResponse:
-        """Generate a scenario using AI"""
+    async def _generate_scenario(
+        self,
+        prompt: str,
+        key: str,
+        template_id: Optional[str],
+        slots: Optional[Dict]
+    ) -> AIResponse:
+        """Generate a scenario, from cache or the AI providers"""
+        structural = self.cache_service is not None and template_id is not None
         
-        # Check cache first if available
+        # Check cache first if available: exact prompt, then prompt shape
         if self.cache_service:
             cached_response = await self.cache_service.get_scenario(prompt)
+            if not cached_response and structural:
+                cached_response = await self.cache_service.get_scenario_structural(
+                    template_id,
+                    slots
+                )
             if cached_response:
+                self._responses[key] = cached_response
                 return cached_response
 
         try:
             # Try primary provider
-            response_text = await self.primary_provider.generate_completion(prompt)
+            response_text = await self.primary_provider.generate_completion(
+                prompt,
+                system=SCENARIO_SYSTEM_PROMPT
+            )
             response = self._parse_response(response_text)
             
         except Exception as e:
@@ -109,17 +299,33 @@ class AIService:
             if self.backup_provider:
                 try:
                     # Fallback to backup provider
-                    response_text = await self.backup_provider.generate_completion(prompt)
+                    response_text = await self.backup_provider.generate_completion(
+                        prompt,
+                        system=SCENARIO_SYSTEM_PROMPT
+                    )
                     response = self._parse_response(response_text)
                 except Exception as backup_error:
                     logger.error(f"Backup AI provider failed: {str(backup_error)}")
+                    if isinstance(backup_error, ValueError):
+                        self._malformed[key] = True
                     raise RuntimeError("All AI providers failed")
             else:
+                # Don't call the provider again right away for a prompt
+                # that just produced an unparseable response
+                if isinstance(e, ValueError):
+                    self._malformed[key] = True
                 raise
 
         # Cache successful response if caching is available
+        self._responses[key] = response
         if self.cache_service:
             await self.cache_service.store_scenario(prompt, response)
+            if structural:
+                await self.cache_service.store_scenario_structural(
+                    template_id,
+                    slots,
+                    response
+                )
 
         return response
 
@@ -127,68 +333,29 @@ class AIService:
         """Parse AI response into structured format"""
         try:
             # Assuming response is in JSON format
-            import json
-            response_dict = json.loads(response_text)
+            response_dict = orjson.loads(response_text)
             
             # Validate required fields
-            required_fields = [
-                'scenario_title',
-                'description',
-                'stakeholders_affected',
-                'approaches'
-            ]
-            
-            for field in required_fields:
-                if field not in response_dict:
-                    raise ValueError(f"Missing required field: {field}")
+            missing = _REQUIRED_FIELDS.difference(response_dict)
+            if missing:
+                raise ValueError(
+                    f"Missing required fields: {', '.join(sorted(missing))}"
+                )
 
             return AIResponse(
-                scenario_title=response_dict['scenario_title'],
-                description=response_dict['description'],
-                stakeholders_affected=response_dict['stakeholders_affected'],
-                approaches=response_dict['approaches'],
+                **{field: response_dict[field] for field in _REQUIRED_FIELDS},
                 hidden_factors=response_dict.get('hidden_factors', []),
                 category=response_dict.get('category', 'general'),
                 raw_response=response_dict
             )
 
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             logger.error("Failed to parse AI response as JSON")
             raise ValueError("Invalid AI response format")
         except Exception as e:
             logger.error(f"Error parsing AI response: {str(e)}")
             raise
 
-    def _enhance_prompt(self, base_prompt: str) -> str:
-        """Enhance prompt with additional context and formatting"""
-        return f"""
-        You are an expert in business ethics and scenario design.
-        Generate a realistic and challenging business ethics scenario in JSON format.
-        
-        Requirements:
-        {base_prompt}
-        
-        Response must be valid JSON with the following structure:
-        {{
-            "scenario_title": "string",
-            "description": "string",
-            "category": "string",
-            "stakeholders_affected": ["string"],
-            "approaches": [
-                {{
-                    "title": "string",
-                    "description": "string",
-                    "impacts": {{
-                        "financial": int,
-                        "reputation": int,
-                        "stakeholder_name": int
-                    }}
-                }}
-            ],
-            "hidden_factors": ["string"]
-        }}
-        """
-
 # Example usage:
 async def main():
     # Initialize providers
@@ -1,45 +1,134 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
+from itertools import chain
+from string import Formatter
 
-@dataclass
-class ScenarioPrompt:
-    """Manages prompt templates for scenario generation"""
-    
-    @staticmethod
-    def build_prompt(context: Dict[str, Any], difficulty: float) -> str:
-        """Build a prompt based on context and difficulty"""
+# Instructions and response schema shared by every scenario request. Sent
+# as the system prompt, ahead of anything player-specific, so providers
+# can serve it from their prompt cache.
+SCENARIO_SYSTEM_PROMPT = """
+        You are an expert in business ethics and scenario design.
+        Generate a realistic and challenging business ethics scenario from
+        the specifications in the user message.
         
-        base_template = """
+        Generate a scenario that:
+        - Challenges observed biases in decision-making
+        - Creates meaningful tension between stakeholder interests
+        - Incorporates realistic business constraints
+        - Provides 3-4 distinct approaches with varying risk-reward profiles
+        - Includes hidden factors that may emerge during implementation
+        
+        Response must be valid JSON with the following structure:
+        {
+            "scenario_title": "string",
+            "description": "string",
+            "category": "string",
+            "stakeholders_affected": ["string"],
+            "approaches": [
+                {
+                    "title": "string",
+                    "description": "string",
+                    "impacts": {
+                        "financial": int,
+                        "reputation": int,
+                        "stakeholder_name": int
+                    }
+                }
+            ],
+            "hidden_factors": ["string"]
+        }
+        """
+
+# Player-specific specifications, ordered from the slots that change least
+# between requests to those that change on every request, so the longest
+# possible prefix matches earlier prompts
+_BASE_TEMPLATE = """
         Create a business ethics scenario with the following specifications:
         
         Company Context:
-        - Size: {company_size}
         - Industry: {industry}
+        - Size: {company_size}
         - Market Position: {market_position}
         - Current Challenges: {challenges}
         
-        Stakeholder Context:
-        {stakeholder_details}
-        
-        Player History:
-        - Recent Decisions: {recent_decisions}
-        - Learning Patterns: {learning_patterns}
-        
         Scenario Requirements:
         1. Difficulty Level: {difficulty}/1.0
         2. Focus Areas: {focus_areas}
         3. Required Stakeholder Involvement: {required_stakeholders}
         4. Learning Objectives: {learning_objectives}
         
-        Generate a scenario that:
-        - Challenges observed biases in decision-making
-        - Creates meaningful tension between stakeholder interests
-        - Incorporates realistic business constraints
-        - Provides 3-4 distinct approaches with varying risk-reward profiles
-        - Includes hidden factors that may emerge during implementation
+        Player History:
+        - Learning Patterns: {learning_patterns}
+        - Recent Decisions: {recent_decisions}
         
-        Response must be in valid JSON format matching the provided schema.
+        Stakeholder Context:
+        {stakeholder_details}
         """
+
+def _compile(template: str) -> Tuple[List[str], List[str]]:
+    """Split a format template into literal segments and field names"""
+    segments, fields = [], []
+    for literal, field, _, _ in Formatter().parse(template):
+        segments.append(literal)
+        if field is not None:
+            fields.append(field)
+    # Always end on a literal segment, even if empty
+    if len(segments) == len(fields):
+        segments.append("")
+    return segments, fields
+
+# Stakeholder names come from a small fixed set; title-case each once
+_stakeholder_title = lru_cache(maxsize=128)(str.title)
+
+# The template is split once at import, so building a prompt is a join
+# rather than a str.format parse
+_SEGMENTS, _FIELDS = _compile(_BASE_TEMPLATE)
+
+# Identifies the template a prompt was rendered from; bump when either
+# template changes so structurally cached scenarios are not reused
+SCENARIO_TEMPLATE_ID = "scenario_base:v2"
+
+# Per-player slots left out of the structural cache key: exact
+# satisfaction figures and decision history vary on every request
+_VOLATILE_SLOTS = frozenset({'stakeholder_details', 'recent_decisions'})
+
+def _render(values: Dict[str, Any]) -> str:
+    """Fill the base template with values for every placeholder"""
+    return "".join(
+        chain.from_iterable(
+            zip(_SEGMENTS, (str(values[field]) for field in _FIELDS))
+        )
+    ) + _SEGMENTS[-1]
+
+@dataclass
+class ScenarioPrompt:
+    """Manages prompt templates for scenario generation"""
+    
+    @staticmethod
+    def build_prompt(context: Dict[str, Any], difficulty: float) -> str:
+        """Build a prompt based on context and difficulty"""
+        return ScenarioPrompt.render(
+            ScenarioPrompt.build_slots(context, difficulty)
+        )
+
+    @staticmethod
+    def render(slots: Dict[str, Any]) -> str:
+        """Render the base template from slot values"""
+        return _render(slots)
+
+    @staticmethod
+    def structural_slots(slots: Dict[str, Any]) -> Dict[str, Any]:
+        """Slot values that decide a scenario's shape, for structural caching"""
+        # Difficulty is already quantized to 0.1 by build_slots
+        return {
+            field: value for field, value in slots.items()
+            if field not in _VOLATILE_SLOTS
+        }
+
+    @staticmethod
+    def build_slots(context: Dict[str, Any], difficulty: float) -> Dict[str, Any]:
+        """Resolve the base template's slot values from context and difficulty"""
         
         # Format stakeholder details
         stakeholder_details = ScenarioPrompt._format_stakeholder_details(
@@ -62,7 +151,7 @@ class ScenarioPrompt:
             difficulty
         )
         
-        return base_template.format(
+        return dict(
             company_size=context.get('company_size', 'medium'),
             industry=context.get('industry', 'general'),
             market_position=context.get('market_position', 'stable'),
@@ -81,12 +170,11 @@ class ScenarioPrompt:
     @staticmethod
     def _format_stakeholder_details(stakeholder_satisfaction: Dict[str, float]) -> str:
         """Format stakeholder satisfaction levels into readable text"""
-        details = []
-        for stakeholder, satisfaction in stakeholder_satisfaction.items():
-            status = "concerned" if satisfaction < 50 else \
-                    "neutral" if satisfaction < 75 else "satisfied"
-            details.append(f"- {stakeholder.title()}: {satisfaction}% ({status})")
-        return "\n".join(details)
+        return "\n".join(
+            f"- {_stakeholder_title(stakeholder)}: {satisfaction}% "
+            f"({'concerned' if satisfaction < 50 else 'neutral' if satisfaction < 75 else 'satisfied'})"
+            for stakeholder, satisfaction in stakeholder_satisfaction.items()
+        )
 
     @staticmethod
     def _format_recent_decisions(decisions: list) -> str:
@@ -94,14 +182,13 @@ class ScenarioPrompt:
         if not decisions:
             return "No recent decisions"
         
-        formatted = []
-        for decision in decisions[-3:]:  # Last 3 decisions
-            formatted.append(
-                f"- {decision.get('type', 'Unknown')}: "
-                f"{decision.get('choice', 'Unknown')} "
-                f"(Impact: {decision.get('impact', 'Unknown')})"
-            )
-        return "\n".join(formatted)
+        tail = decisions[-3:]  # Last 3 decisions
+        return "\n".join(
+            f"- {decision.get('type', 'Unknown')}: "
+            f"{decision.get('choice', 'Unknown')} "
+            f"(Impact: {decision.get('impact', 'Unknown')})"
+            for decision in tail
+        )
 
     @staticmethod
     def _identify_focus_areas(learning_patterns: Dict) -> list:
@@ -3,7 +3,7 @@ from dataclasses import dataclass
 import logging
 from datetime import datetime
 
-from .prompt_templates import ScenarioPrompt
+from .prompt_templates import ScenarioPrompt, SCENARIO_TEMPLATE_ID
 from .ai_service import AIService
 from ..models.scenario import Scenario, Approach, Impact
 from ..models.game_state import GameState
@@ -12,7 +12,7 @@ from ..analytics.pattern_analyzer import PatternAnalyzer
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(slots=True)
 class ScenarioContext:
     """Context data for scenario generation"""
     company_size: str
@@ -26,9 +26,27 @@ class ScenarioContext:
 class ScenarioGenerator:
     """Generates ethical business scenarios using AI"""
     
+    _instance = None
+    
     def __init__(self, ai_service: AIService, pattern_analyzer: PatternAnalyzer):
         self.ai_service = ai_service
         self.pattern_analyzer = pattern_analyzer
+
+    @classmethod
+    def get_instance(
+        cls,
+        ai_service: AIService,
+        pattern_analyzer: PatternAnalyzer
+    ) -> 'ScenarioGenerator':
+        """Get shared ScenarioGenerator, rebuilt only if its dependencies change"""
+        instance = cls._instance
+        if (
+            instance is None
+            or instance.ai_service is not ai_service
+            or instance.pattern_analyzer is not pattern_analyzer
+        ):
+            instance = cls._instance = cls(ai_service, pattern_analyzer)
+        return instance
         
     async def generate_scenario(
         self,
@@ -81,15 +99,21 @@ class ScenarioGenerator:
     async def _generate_base_scenario(self, context: ScenarioContext) -> Scenario:
         """Generate base scenario using AI"""
         
-        # Build prompt from context
-        prompt = ScenarioPrompt.build_prompt(
+        # Build prompt from context, keeping the slot values so scenarios
+        # can also be cached by template and prompt shape
+        slots = ScenarioPrompt.build_slots(
             context=context,
             difficulty=self._calculate_difficulty(context)
         )
+        prompt = ScenarioPrompt.render(slots)
         
         try:
             # Get AI response
-            ai_response = await self.ai_service.generate_scenario(prompt)
+            ai_response = await self.ai_service.generate_scenario(
+                prompt,
+                template_id=SCENARIO_TEMPLATE_ID,
+                slots=ScenarioPrompt.structural_slots(slots)
+            )
             
             # Parse and validate AI response
             scenario = self._parse_ai_response(ai_response)
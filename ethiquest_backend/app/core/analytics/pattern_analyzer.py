@@ -1,10 +1,18 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 import numpy as np
 from collections import defaultdict
+from cachetools import LRUCache
 
-@dataclass
+# Analyses kept per process, keyed by decision-history fingerprint and
+# player level
+PATTERN_CACHE_SIZE = 4096
+
+# Stakeholder similarity of two decisions that affect no stakeholders
+EMPTY_STAKEHOLDER_SIMILARITY = 1.0
+
+@dataclass(slots=True)
 class Decision:
     id: str
     timestamp: datetime
@@ -16,7 +24,7 @@ class Decision:
     time_spent: int  # seconds
     difficulty_level: float
 
-@dataclass
+@dataclass(slots=True)
 class LearningPattern:
     bias_score: float  # -1 to 1, where 0 is balanced
     confidence: float  # 0 to 1
@@ -27,11 +35,98 @@ class LearningPattern:
     decision_speed: float  # relative to average
     consistency_score: float  # 0 to 1
 
+@dataclass
+class DecisionColumns:
+    """Column-oriented view of a decision history, built once per analysis"""
+    time_spent: np.ndarray
+    difficulty: np.ndarray
+    scenario_type: np.ndarray
+    impact_mean: np.ndarray  # mean of all impact values
+    short_term_delta: np.ndarray  # immediate - long_term impact
+    financial_delta: np.ndarray  # financial - mean affected stakeholder impact
+    # One entry per (decision, affected stakeholder) pair
+    stakeholder: np.ndarray
+    stakeholder_impact: np.ndarray
+    # Impact on each skill subcategory, one row per decision (0 if absent)
+    skill_impacts: np.ndarray
+    # Affected stakeholders of each decision as a bitmask
+    stakeholder_mask: List[int]
+
+    @classmethod
+    def from_decisions(
+        cls,
+        decisions: List[Decision],
+        skill_vocab: Dict[str, int],
+        stakeholder_bits: Dict[str, int]
+    ) -> 'DecisionColumns':
+        """
+        Gather decision attributes into arrays in a single pass. Stakeholders
+        not yet in stakeholder_bits are assigned the next free bit.
+        """
+        n = len(decisions)
+        skill_impacts = np.zeros((n, len(skill_vocab)))
+        stakeholder_mask = [0] * n
+        time_spent = np.empty(n)
+        difficulty = np.empty(n)
+        impact_mean = np.empty(n)
+        short_term_delta = np.empty(n)
+        financial_delta = np.empty(n)
+        stakeholders = []
+        stakeholder_impacts = []
+        
+        for i, decision in enumerate(decisions):
+            impacts = decision.impacts
+            values = list(impacts.values())
+            stakeholder_values = [
+                impacts.get(s, 0) for s in decision.stakeholders_affected
+            ]
+            
+            time_spent[i] = decision.time_spent
+            difficulty[i] = decision.difficulty_level
+            impact_mean[i] = sum(values) / len(values) if values else np.nan
+            short_term_delta[i] = (
+                impacts.get('immediate', 0) - impacts.get('long_term', 0)
+            )
+            financial_delta[i] = impacts.get('financial', 0) - (
+                sum(stakeholder_values) / len(stakeholder_values)
+                if stakeholder_values else np.nan
+            )
+            stakeholders.extend(decision.stakeholders_affected)
+            stakeholder_impacts.extend(stakeholder_values)
+            mask = 0
+            for stakeholder in decision.stakeholders_affected:
+                bit = stakeholder_bits.get(stakeholder)
+                if bit is None:
+                    bit = stakeholder_bits[stakeholder] = 1 << len(stakeholder_bits)
+                mask |= bit
+            stakeholder_mask[i] = mask
+            for name, value in impacts.items():
+                column = skill_vocab.get(name)
+                if column is not None:
+                    skill_impacts[i, column] = value
+        
+        return cls(
+            time_spent=time_spent,
+            difficulty=difficulty,
+            scenario_type=np.array(
+                [d.scenario_type for d in decisions],
+                dtype=object
+            ),
+            impact_mean=impact_mean,
+            short_term_delta=short_term_delta,
+            financial_delta=financial_delta,
+            stakeholder=np.array(stakeholders, dtype=object),
+            stakeholder_impact=np.array(stakeholder_impacts, dtype=float),
+            skill_impacts=skill_impacts,
+            stakeholder_mask=stakeholder_mask
+        )
+
 class PatternAnalyzer:
     """Analyzes player decision patterns and learning behavior"""
 
     def __init__(self, min_decisions: int = 5):
         self.min_decisions = min_decisions
+        self._pattern_cache = LRUCache(maxsize=PATTERN_CACHE_SIZE)
         self.skill_categories = {
             'stakeholder_management': [
                 'employee_relations',
@@ -54,186 +149,208 @@ class PatternAnalyzer:
                 'change_management'
             ]
         }
+        
+        # Subcategory -> column index, and a category x subcategory matrix
+        # whose rows average that category's subcategory columns
+        self._skill_names = list(self.skill_categories)
+        self._skill_vocab = {
+            subcategory: i
+            for i, subcategory in enumerate(
+                dict.fromkeys(
+                    subcategory
+                    for subcategories in self.skill_categories.values()
+                    for subcategory in subcategories
+                )
+            )
+        }
+        membership = np.zeros((len(self._skill_names), len(self._skill_vocab)))
+        for row, subcategories in enumerate(self.skill_categories.values()):
+            membership[row, [self._skill_vocab[s] for s in subcategories]] = 1
+        self._skill_weights = membership / membership.sum(axis=1, keepdims=True)
+        
+        # Stakeholder name -> bit, grown as new names appear in decisions
+        self._stakeholder_bits: Dict[str, int] = {}
 
     def analyze_patterns(
         self,
         decisions: List[Decision],
-        current_level: int
+        current_level: Optional[int] = None
     ) -> LearningPattern:
         """Analyze player's decision patterns and learning behavior"""
         
         if len(decisions) < self.min_decisions:
             return self._generate_initial_pattern()
 
+        fingerprint = (*self._fingerprint(decisions), current_level)
+        pattern = self._pattern_cache.get(fingerprint)
+        if pattern is None:
+            pattern = self._analyze(decisions)
+            if pattern is not None:
+                self._pattern_cache[fingerprint] = pattern
+        return pattern or self._generate_initial_pattern()
+
+    @staticmethod
+    def _fingerprint(decisions: List[Decision]) -> Tuple[str, str, int]:
+        """Identify a decision history without hashing its contents"""
+        # Decision ids are unique and histories are append-only, so the
+        # first id pins the player and the last id and length its position
+        return (decisions[0].id, decisions[-1].id, len(decisions))
+
+    def _analyze(self, decisions: List[Decision]) -> Optional[LearningPattern]:
+        """Compute patterns for a history, or None if analysis fails"""
         try:
+            columns = DecisionColumns.from_decisions(
+                decisions,
+                self._skill_vocab,
+                self._stakeholder_bits
+            )
             return LearningPattern(
-                bias_score=self._calculate_bias_score(decisions),
-                confidence=self._calculate_confidence(decisions),
-                stakeholder_preferences=self._analyze_stakeholder_preferences(decisions),
-                avoided_topics=self._identify_avoided_topics(decisions),
-                skill_levels=self._assess_skill_levels(decisions),
-                learning_rate=self._calculate_learning_rate(decisions),
-                decision_speed=self._analyze_decision_speed(decisions),
+                bias_score=self._calculate_bias_score(columns),
+                confidence=self._calculate_confidence(decisions, columns),
+                stakeholder_preferences=self._analyze_stakeholder_preferences(columns),
+                avoided_topics=self._identify_avoided_topics(columns),
+                skill_levels=self._assess_skill_levels(columns),
+                learning_rate=self._calculate_learning_rate(columns),
+                decision_speed=self._analyze_decision_speed(columns),
                 consistency_score=self._calculate_consistency(decisions)
             )
         except Exception as e:
             print(f"Error in pattern analysis: {str(e)}")
-            return self._generate_initial_pattern()
+            return None
 
-    def _calculate_bias_score(self, decisions: List[Decision]) -> float:
+    def _calculate_bias_score(self, columns: DecisionColumns) -> float:
         """Calculate bias in decision making"""
-        biases = {
-            'short_term': 0,
-            'financial': 0,
-            'stakeholder': 0
-        }
+        # Short-term vs long-term bias
+        short_term = columns.short_term_delta.sum() / 100
+        # Financial vs stakeholder bias
+        financial = columns.financial_delta.sum() / 100
         
-        for decision in decisions:
-            # Short-term vs long-term bias
-            impacts = decision.impacts
-            short_term_impact = impacts.get('immediate', 0)
-            long_term_impact = impacts.get('long_term', 0)
-            biases['short_term'] += (short_term_impact - long_term_impact) / 100
-
-            # Financial vs stakeholder bias
-            financial_impact = impacts.get('financial', 0)
-            stakeholder_impact = np.mean([
-                impacts.get(s, 0) for s in decision.stakeholders_affected
-            ])
-            biases['financial'] += (financial_impact - stakeholder_impact) / 100
-
-        # Normalize biases
-        return np.mean(list(biases.values()))
+        # Normalize biases, averaged with a neutral stakeholder bias of 0
+        return (short_term + financial) / 3
 
-    def _calculate_confidence(self, decisions: List[Decision]) -> float:
+    def _calculate_confidence(
+        self,
+        decisions: List[Decision],
+        columns: DecisionColumns
+    ) -> float:
         """Calculate player's decision-making confidence"""
-        recent_decisions = sorted(decisions, key=lambda x: x.timestamp)[-5:]
+        # Decisions arrive oldest first from DBService.get_player_decisions
+        recent_decisions = decisions[-5:]
         
-        factors = {
-            'time_spent': [],  # Normalized decision time
-            'changes': 0,      # Number of decision changes
-            'consistency': []  # Consistency with previous similar decisions
-        }
+        # Normalized decision time
+        recent_times = columns.time_spent[-5:]
+        normalized_times = np.minimum(recent_times / recent_times.mean(), 2)
         
-        for i, decision in enumerate(recent_decisions):
-            # Analyze decision time
-            avg_time = np.mean([d.time_spent for d in recent_decisions])
-            normalized_time = min(decision.time_spent / avg_time, 2)
-            factors['time_spent'].append(normalized_time)
-            
-            # Check for decision changes
-            if i > 0:
-                prev_decision = recent_decisions[i-1]
-                if decision.scenario_type == prev_decision.scenario_type:
-                    similarity = self._calculate_decision_similarity(
-                        decision, prev_decision
-                    )
-                    factors['consistency'].append(similarity)
+        # Consistency with previous similar decisions
+        recent_masks = columns.stakeholder_mask[-5:]
+        consistency = [
+            self._calculate_decision_similarity(
+                recent_decisions[i],
+                recent_decisions[i - 1],
+                recent_masks[i],
+                recent_masks[i - 1]
+            )
+            for i in range(1, len(recent_decisions))
+            if recent_decisions[i].scenario_type
+            == recent_decisions[i - 1].scenario_type
+        ]
+        
+        # Number of decision changes
+        changes = 0
 
         confidence_score = np.mean([
-            1 - np.std(factors['time_spent']),  # Time consistency
-            np.mean(factors['consistency']) if factors['consistency'] else 0.5,
-            1 - (factors['changes'] / len(recent_decisions))
+            1 - np.std(normalized_times),  # Time consistency
+            np.mean(consistency) if consistency else 0.5,
+            1 - (changes / len(recent_decisions))
         ])
         
         return max(0, min(1, confidence_score))
 
     def _analyze_stakeholder_preferences(
         self,
-        decisions: List[Decision]
+        columns: DecisionColumns
     ) -> Dict[str, float]:
         """Analyze preferences toward different stakeholders"""
-        stakeholder_impacts = defaultdict(list)
+        if not len(columns.stakeholder):
+            return {}
         
-        for decision in decisions:
-            for stakeholder in decision.stakeholders_affected:
-                impact = decision.impacts.get(stakeholder, 0)
-                stakeholder_impacts[stakeholder].append(impact)
+        stakeholders, first_seen, index = np.unique(
+            columns.stakeholder,
+            return_index=True,
+            return_inverse=True
+        )
+        avg_impact = np.bincount(
+            index,
+            weights=columns.stakeholder_impact
+        ) / np.bincount(index)
+        preferences = (avg_impact + 100) / 200  # Normalize to 0-1
         
-        preferences = {}
-        for stakeholder, impacts in stakeholder_impacts.items():
-            avg_impact = np.mean(impacts)
-            preferences[stakeholder] = (avg_impact + 100) / 200  # Normalize to 0-1
-            
-        return preferences
+        # Stakeholders in first-seen order
+        order = np.argsort(first_seen)
+        return dict(zip(stakeholders[order], preferences[order].tolist()))
 
-    def _identify_avoided_topics(self, decisions: List[Decision]) -> List[str]:
+    def _identify_avoided_topics(self, columns: DecisionColumns) -> List[str]:
         """Identify topics the player tends to avoid"""
-        topic_counts = defaultdict(int)
-        topic_avoidance = defaultdict(int)
-        
-        for decision in decisions:
-            topic_counts[decision.scenario_type] += 1
-            if self._is_avoidance_behavior(decision):
-                topic_avoidance[decision.scenario_type] += 1
+        topics, first_seen, topic_index = np.unique(
+            columns.scenario_type,
+            return_index=True,
+            return_inverse=True
+        )
+        topic_counts = np.bincount(topic_index, minlength=len(topics))
+        topic_avoidance = np.bincount(
+            topic_index,
+            weights=self._avoidance_mask(columns),
+            minlength=len(topics)
+        )
         
-        avoided_topics = []
-        for topic, count in topic_counts.items():
-            avoidance_rate = topic_avoidance[topic] / count
-            if avoidance_rate > 0.7:  # High avoidance threshold
-                avoided_topics.append(topic)
-                
-        return avoided_topics
+        # High avoidance threshold; topics reported in first-seen order
+        avoided = topic_avoidance / topic_counts > 0.7
+        order = np.argsort(first_seen)
+        return [topic for topic in topics[order][avoided[order]]]
 
-    def _assess_skill_levels(self, decisions: List[Decision]) -> Dict[str, float]:
+    def _assess_skill_levels(self, columns: DecisionColumns) -> Dict[str, float]:
         """Assess player's skill levels in different areas"""
-        skills = defaultdict(list)
-        
-        for decision in decisions:
-            # Evaluate each skill category
-            for category, subcategories in self.skill_categories.items():
-                skill_score = self._calculate_skill_score(decision, subcategories)
-                skills[category].append(skill_score)
-        
-        return {
-            category: np.mean(scores)
-            for category, scores in skills.items()
-        }
+        # Each decision's score in a category is its mean impact on the
+        # category's subcategories, normalized to 0-1
+        scores = (columns.skill_impacts @ self._skill_weights.T + 100) / 200
+        return dict(zip(self._skill_names, scores.mean(axis=0).tolist()))
 
-    def _calculate_learning_rate(self, decisions: List[Decision]) -> float:
+    def _calculate_learning_rate(self, columns: DecisionColumns) -> float:
         """Calculate player's learning rate"""
-        if len(decisions) < 10:
+        n = len(columns.time_spent)
+        if n < 10:
             return 0.5  # Default for insufficient data
             
-        # Sort decisions by time
-        sorted_decisions = sorted(decisions, key=lambda x: x.timestamp)
-        
-        # Calculate performance improvement over time
-        performance_trend = []
+        # Performance of each sliding window of decisions, oldest first
         window_size = 5
-        
-        for i in range(len(sorted_decisions) - window_size):
-            window = sorted_decisions[i:i+window_size]
-            performance = self._calculate_window_performance(window)
-            performance_trend.append(performance)
-        
-        if not performance_trend:
-            return 0.5
+        scores = (columns.impact_mean + 100) / 200 * columns.difficulty
+        performance_trend = np.convolve(
+            scores,
+            np.full(window_size, 1 / window_size),
+            mode='valid'
+        )[:n - window_size]
             
-        # Calculate learning rate from trend
-        learning_rate = np.polyfit(
-            range(len(performance_trend)),
-            performance_trend,
-            1
-        )[0]
+        # Learning rate is the least-squares slope of the trend over
+        # x = 0..m-1, whose sums have closed forms
+        m = len(performance_trend)
+        sum_x = m * (m - 1) / 2
+        sum_x2 = m * (m - 1) * (2 * m - 1) / 6
+        sum_xy = np.arange(m) @ performance_trend
+        learning_rate = (
+            (m * sum_xy - sum_x * performance_trend.sum())
+            / (m * sum_x2 - sum_x ** 2)
+        )
         
         # Normalize to 0-1 range
         return max(0, min(1, (learning_rate + 1) / 2))
 
-    def _analyze_decision_speed(self, decisions: List[Decision]) -> float:
+    def _analyze_decision_speed(self, columns: DecisionColumns) -> float:
         """Analyze decision-making speed relative to difficulty"""
-        if not decisions:
+        if not len(columns.time_spent):
             return 0.5
             
-        speed_scores = []
-        for decision in decisions:
-            expected_time = 30 + (90 * decision.difficulty_level)  # seconds
-            actual_time = decision.time_spent
-            
-            speed_ratio = expected_time / actual_time
-            speed_scores.append(speed_ratio)
-        
-        avg_speed = np.mean(speed_scores)
+        expected_time = 30 + (90 * columns.difficulty)  # seconds
+        avg_speed = np.mean(expected_time / columns.time_spent)
         return max(0, min(1, avg_speed))
 
     def _calculate_consistency(self, decisions: List[Decision]) -> float:
@@ -252,25 +369,62 @@ class PatternAnalyzer:
         for scenario_type, type_decisions in scenario_decisions.items():
             if len(type_decisions) < 2:
                 continue
-                
-            similarities = []
-            for i in range(len(type_decisions)-1):
-                for j in range(i+1, len(type_decisions)):
-                    similarity = self._calculate_decision_similarity(
-                        type_decisions[i],
-                        type_decisions[j]
-                    )
-                    similarities.append(similarity)
             
-            if similarities:
-                consistency_scores.append(np.mean(similarities))
+            similarities = self._pairwise_similarity(type_decisions)
+            upper = np.triu_indices(len(type_decisions), k=1)
+            consistency_scores.append(similarities[upper].mean())
         
         return np.mean(consistency_scores) if consistency_scores else 0.5
 
+    def _pairwise_similarity(self, decisions: List[Decision]) -> np.ndarray:
+        """
+        Similarity of every pair of decisions, as _calculate_decision_similarity
+        computes for one pair, in matrix form
+        """
+        impact_keys = list({key for d in decisions for key in d.impacts})
+        stakeholders = list({s for d in decisions for s in d.stakeholders_affected})
+        
+        # Impact values, and which impacts each decision reports
+        impacts = np.array(
+            [[d.impacts.get(key, 0) for key in impact_keys] for d in decisions],
+            dtype=float
+        ).reshape(len(decisions), len(impact_keys))
+        reported = np.array(
+            [[key in d.impacts for key in impact_keys] for d in decisions],
+            dtype=bool
+        ).reshape(len(decisions), len(impact_keys))
+        affected = np.array(
+            [
+                [s in d.stakeholders_affected for s in stakeholders]
+                for d in decisions
+            ],
+            dtype=float
+        ).reshape(len(decisions), len(stakeholders))
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Mean normalized difference over the impacts either reports
+            differences = np.abs(impacts[:, None, :] - impacts[None, :, :]).sum(-1)
+            reported_either = (reported[:, None, :] | reported[None, :, :]).sum(-1)
+            impact_similarity = 1 - differences / 200 / reported_either
+            
+            # Jaccard similarity of the affected stakeholder sets
+            shared = affected @ affected.T
+            counts = affected.sum(1)
+            union = counts[:, None] + counts[None, :] - shared
+            stakeholder_similarity = np.where(
+                union > 0,
+                shared / union,
+                EMPTY_STAKEHOLDER_SIMILARITY
+            )
+        
+        return (impact_similarity + stakeholder_similarity) / 2
+
     def _calculate_decision_similarity(
         self,
         decision1: Decision,
-        decision2: Decision
+        decision2: Decision,
+        mask1: int,
+        mask2: int
     ) -> float:
         """Calculate similarity between two decisions"""
         impact_similarity = self._calculate_impact_similarity(
@@ -278,12 +432,12 @@ class PatternAnalyzer:
             decision2.impacts
         )
         
-        stakeholder_similarity = len(
-            set(decision1.stakeholders_affected) &
-            set(decision2.stakeholders_affected)
-        ) / len(
-            set(decision1.stakeholders_affected) |
-            set(decision2.stakeholders_affected)
+        # Jaccard similarity of the stakeholder bitmasks; two decisions
+        # affecting no stakeholders have identical (empty) sets
+        union = (mask1 | mask2).bit_count()
+        stakeholder_similarity = (
+            (mask1 & mask2).bit_count() / union
+            if union else EMPTY_STAKEHOLDER_SIMILARITY
         )
         
         return (impact_similarity + stakeholder_similarity) / 2
@@ -294,37 +448,29 @@ class PatternAnalyzer:
         impacts2: Dict[str, float]
     ) -> float:
         """Calculate similarity between impact patterns"""
-        all_keys = set(impacts1.keys()) | set(impacts2.keys())
-        differences = []
+        all_keys = impacts1.keys() | impacts2.keys()
+        if not all_keys:
+            return np.nan
         
-        for key in all_keys:
-            val1 = impacts1.get(key, 0)
-            val2 = impacts2.get(key, 0)
-            differences.append(abs(val1 - val2) / 200)  # Normalize by max range
-            
-        return 1 - np.mean(differences)
-
-    def _calculate_window_performance(self, decisions: List[Decision]) -> float:
-        """Calculate performance score for a window of decisions"""
-        scores = []
-        for decision in decisions:
-            impact_score = np.mean(list(decision.impacts.values()))
-            difficulty_adj = decision.difficulty_level
-            scores.append((impact_score + 100) / 200 * difficulty_adj)
-        return np.mean(scores)
+        # Plain arithmetic: np.mean on a handful of values costs more in
+        # call overhead than the sum itself
+        difference = sum(
+            abs(impacts1.get(key, 0) - impacts2.get(key, 0))
+            for key in all_keys
+        )
+        return 1 - difference / 200 / len(all_keys)  # Normalize by max range
 
-    def _is_avoidance_behavior(self, decision: Decision) -> bool:
-        """Detect if a decision shows avoidance behavior"""
+    def _avoidance_mask(self, columns: DecisionColumns) -> np.ndarray:
+        """Detect which decisions show avoidance behavior"""
         # Consider it avoidance if the player:
         # 1. Chose the safest option
         # 2. Spent very little time
         # 3. Had minimal impact
         
-        avg_impact = np.mean(list(decision.impacts.values()))
-        quick_decision = decision.time_spent < 15  # Less than 15 seconds
-        minimal_impact = abs(avg_impact) < 10
+        quick_decision = columns.time_spent < 15  # Less than 15 seconds
+        minimal_impact = np.abs(columns.impact_mean) < 10
         
-        return quick_decision and minimal_impact
+        return quick_decision & minimal_impact
 
     def _generate_initial_pattern(self) -> LearningPattern:
         """Generate initial pattern for new players"""
@@ -0,0 +1,681 @@
+import asyncio
+from typing import Optional, Dict, Any, Callable, Awaitable, Tuple, Union
+import hashlib
+import orjson
+import redis.asyncio as redis
+import zstandard as zstd
+from cachetools import TTLCache
+from datetime import timedelta
+
+# Sentinel stored for lookups known to have no value (negative caching)
+MISSING = b"__missing__"
+
+# Key types deleted when their data changes, possibly by another worker
+# whose delete cannot evict this process's L1
+INVALIDATED_KEY_TYPES = ("player:", "scenario_zst:")
+
+class CacheService:
+    """Handles caching of AI responses and game states"""
+    
+    def __init__(
+        self,
+        redis_url: str,
+        default_ttl: int = 3600,  # 1 hour default
+        prefix: str = "ethiquest:",
+        zstd_level: int = 3,
+        zstd_dict_path: Optional[str] = None,
+        local_size: int = 10_000,
+        local_ttl: int = 30,
+        local_invalidated_ttl: float = 1,
+        max_connections: int = 50,
+        health_check_interval: int = 30
+    ):
+        # One bounded pool shared by every call; idle connections are
+        # pinged before reuse instead of failing and reconnecting
+        self.redis = redis.from_url(
+            redis_url,
+            max_connections=max_connections,
+            health_check_interval=health_check_interval,
+            decode_responses=False
+        )
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+        
+        # In-process L1 of raw values by full Redis key. Only hits are
+        # kept, never MISSING, and writes and deletes through this
+        # instance update it. Access never spans an await, so no lock is
+        # needed.
+        self._local = TTLCache(maxsize=local_size, ttl=local_ttl)
+        # Invalidated key types are only held briefly, bounding how long
+        # a delete made by another worker goes unseen here
+        self._local_invalidated = TTLCache(
+            maxsize=local_size,
+            ttl=local_invalidated_ttl
+        )
+        self._invalidated_prefixes = tuple(
+            f"{prefix}{key_type}" for key_type in INVALIDATED_KEY_TYPES
+        )
+        
+        # Optional trained dictionary for small, repetitive JSON payloads
+        zstd_dict = None
+        if zstd_dict_path:
+            with open(zstd_dict_path, "rb") as f:
+                zstd_dict = zstd.ZstdCompressionDict(f.read())
+        self._compressor = zstd.ZstdCompressor(
+            level=zstd_level,
+            dict_data=zstd_dict
+        )
+        self._decompressor = zstd.ZstdDecompressor(dict_data=zstd_dict)
+        # Tag for keys of compressed values, so a new dictionary never
+        # meets payloads compressed with another one
+        self.compression_tag = f"zst{zstd_dict.dict_id() if zstd_dict else 0}"
+        
+        # Scenarios are compressed without the analytics dictionary, which
+        # was trained on a different schema
+        self._scenario_compressor = zstd.ZstdCompressor(level=zstd_level)
+        self._scenario_decompressor = zstd.ZstdDecompressor()
+        
+        # Partial game state writes must not create a hash holding only
+        # the updated fields, nor overwrite a negative cache marker
+        self._hset_if_cached = self.redis.register_script(
+            """
+            if redis.call('EXISTS', KEYS[1]) == 1
+                and redis.call('HEXISTS', KEYS[1], '__missing__') == 0 then
+                return redis.call('HSET', KEYS[1], unpack(ARGV))
+            end
+            return 0
+            """
+        )
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a payload for storage"""
+        return self._compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompress a payload produced by compress"""
+        return self._decompressor.decompress(data)
+
+    async def get_raw(self, key: str) -> Optional[bytes]:
+        """Get raw cached bytes for key"""
+        return await self._fetch(f"{self.prefix}{key}")
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get decoded cached value for key"""
+        cached = await self.get_raw(key)
+        
+        if cached and cached != MISSING:
+            try:
+                return orjson.loads(cached)
+            except orjson.JSONDecodeError:
+                await self.delete(key)
+                return None
+        return None
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None
+    ) -> None:
+        """Store value in cache; bytes are stored as-is, anything else as JSON"""
+        ttl = ttl or self.default_ttl
+        payload = value if isinstance(value, bytes) else orjson.dumps(value)
+        
+        try:
+            await self._store(f"{self.prefix}{key}", ttl, payload)
+        except Exception as e:
+            print(f"Cache storage error: {str(e)}")
+
+    async def delete(self, key: str) -> None:
+        """Delete cached value for key"""
+        await self._evict(f"{self.prefix}{key}")
+
+    def _local_for(self, redis_key: str) -> TTLCache:
+        """Get the local cache that holds redis_key"""
+        if redis_key.startswith(self._invalidated_prefixes):
+            return self._local_invalidated
+        return self._local
+
+    def _keep_local(self, redis_key: str, value: bytes) -> None:
+        """Hold a raw value locally, unless it is the MISSING marker"""
+        # MISSING stays in Redis only: once the value exists another
+        # worker overwrites it there, and a local copy would hide it
+        if value != MISSING:
+            self._local_for(redis_key)[redis_key] = value
+
+    async def _fetch(self, redis_key: str) -> Optional[bytes]:
+        """Read a raw value, from the local cache when possible"""
+        cached = self._local_for(redis_key).get(redis_key)
+        if cached is None:
+            cached = await self.redis.get(redis_key)
+            if cached is not None:
+                self._keep_local(redis_key, cached)
+        return cached
+
+    async def _store(self, redis_key: str, ttl: int, payload: bytes) -> None:
+        """Write a raw value through to Redis and the local cache"""
+        # Drop the local copy first so a failed write cannot leave it stale
+        self._local_for(redis_key).pop(redis_key, None)
+        await self.redis.setex(redis_key, ttl, payload)
+        self._keep_local(redis_key, payload)
+
+    async def _fetch_many(self, *redis_keys: str) -> list:
+        """Read several raw values, with one MGET for any not held locally"""
+        values = [self._local_for(key).get(key) for key in redis_keys]
+        misses = [i for i, value in enumerate(values) if value is None]
+        if misses:
+            fetched = await self.redis.mget([redis_keys[i] for i in misses])
+            for i, value in zip(misses, fetched):
+                if value is not None:
+                    self._keep_local(redis_keys[i], value)
+                    values[i] = value
+        return values
+
+    async def _store_many(self, *items: tuple) -> None:
+        """Write several (key, ttl, payload) values in one pipeline"""
+        for redis_key, _, _ in items:
+            self._local_for(redis_key).pop(redis_key, None)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for redis_key, ttl, payload in items:
+                pipe.setex(redis_key, ttl, payload)
+            await pipe.execute()
+        for redis_key, _, payload in items:
+            self._keep_local(redis_key, payload)
+
+    async def _decode(
+        self,
+        redis_key: str,
+        cached: Optional[bytes],
+        compressed: bool = False
+    ) -> Optional[Any]:
+        """Decode a raw (optionally compressed) JSON value, evicting it if corrupt"""
+        if cached:
+            try:
+                if compressed:
+                    cached = self._scenario_decompressor.decompress(cached)
+                return orjson.loads(cached)
+            except (orjson.JSONDecodeError, zstd.ZstdError):
+                await self._evict(redis_key)
+        return None
+
+    def _pack_scenario(self, response: Any) -> bytes:
+        """Serialize and compress a scenario payload; bytes are taken as JSON"""
+        payload = response if isinstance(response, bytes) else orjson.dumps(response)
+        return self._scenario_compressor.compress(payload)
+
+    async def _evict(self, redis_key: str) -> None:
+        """Delete a raw value from Redis and the local cache"""
+        self._local_for(redis_key).pop(redis_key, None)
+        await self.redis.delete(redis_key)
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Optional[bytes]]],
+        ttl: Optional[int] = None,
+        missing_ttl: int = 30,
+        lock_ttl: int = 5,
+        retry_delay: float = 0.05
+    ) -> Optional[bytes]:
+        """
+        Get raw cached bytes for key, calling loader once on a miss.
+        Concurrent misses are coalesced behind a short-lived lock so only
+        one caller loads; a None result is cached briefly as MISSING.
+        """
+        async def write(value: bytes, value_ttl: Optional[int]) -> None:
+            await self.set(key, value, ttl=value_ttl)
+
+        return await self._load_coalesced(
+            key,
+            lambda: self.get_raw(key),
+            write,
+            loader,
+            ttl,
+            missing_ttl,
+            lock_ttl,
+            retry_delay
+        )
+
+    async def _load_coalesced(
+        self,
+        key: str,
+        read: Callable[[], Awaitable[Any]],
+        write: Callable[[Any, Optional[int]], Awaitable[None]],
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int],
+        missing_ttl: int,
+        lock_ttl: int,
+        retry_delay: float
+    ) -> Any:
+        """Read key, or run loader under a per-key lock and write its result"""
+        lock_key = f"{self.prefix}lock:{key}"
+        locked = False
+        waited = 0.0
+        
+        while True:
+            cached = await read()
+            if cached is not None:
+                return None if cached == MISSING else cached
+            
+            locked = await self.redis.set(lock_key, 1, nx=True, ex=lock_ttl)
+            if locked or waited >= lock_ttl:
+                break
+            
+            # Another caller is loading; wait for it to fill the cache
+            await asyncio.sleep(retry_delay)
+            waited += retry_delay
+        
+        try:
+            value = await loader()
+            if value is None:
+                await write(MISSING, missing_ttl)
+            else:
+                await write(value, ttl)
+            return value
+        finally:
+            if locked:
+                await self.redis.delete(lock_key)
+
+    async def get_player(self, player_id: str) -> Optional[Dict[str, Any]]:
+        """Get cached player"""
+        return await self.get(f"player:{player_id}")
+
+    async def set_player(
+        self,
+        player_id: str,
+        player: Union[bytes, Dict[str, Any]],
+        ttl: Optional[int] = None
+    ) -> None:
+        """Store player in cache"""
+        await self.set(f"player:{player_id}", player, ttl=ttl)
+
+    async def delete_player(self, player_id: str) -> None:
+        """Invalidate cached player"""
+        await self.delete(f"player:{player_id}")
+
+    async def get_game_state(self, player_id: str) -> Optional[Dict[str, Any]]:
+        """Get cached game state"""
+        state = await self._read_game_state(player_id)
+        return None if state is None or state == MISSING else state
+
+    async def set_game_state(
+        self,
+        player_id: str,
+        state: Dict[str, Any],
+        ttl: Optional[int] = None
+    ) -> None:
+        """Store game state in cache as a hash with one field per attribute"""
+        await self._write_game_state(player_id, state, ttl)
+
+    async def update_game_state_fields(
+        self,
+        player_id: str,
+        fields: Dict[str, Any]
+    ) -> None:
+        """Update only the given fields of a cached game state"""
+        if not fields:
+            return
+        
+        args = []
+        for field, value in fields.items():
+            args.extend((field, orjson.dumps(value)))
+        
+        try:
+            await self._hset_if_cached(
+                keys=[f"{self.prefix}state:{player_id}"],
+                args=args
+            )
+        except Exception as e:
+            print(f"Cache storage error: {str(e)}")
+
+    async def update_game_state_field(
+        self,
+        player_id: str,
+        field: str,
+        value: Any
+    ) -> None:
+        """Update a single field of a cached game state"""
+        await self.update_game_state_fields(player_id, {field: value})
+
+    async def get_or_load_game_state(
+        self,
+        player_id: str,
+        loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+        ttl: Optional[int] = None,
+        missing_ttl: int = 30,
+        lock_ttl: int = 5,
+        retry_delay: float = 0.05
+    ) -> Optional[Dict[str, Any]]:
+        """Get cached game state, loading it once on a miss like get_or_load"""
+        async def write(state: Any, state_ttl: Optional[int]) -> None:
+            await self._write_game_state(player_id, state, state_ttl)
+
+        return await self._load_coalesced(
+            f"state:{player_id}",
+            lambda: self._read_game_state(player_id),
+            write,
+            loader,
+            ttl,
+            missing_ttl,
+            lock_ttl,
+            retry_delay
+        )
+
+    async def delete_game_state(self, player_id: str) -> None:
+        """Invalidate cached game state"""
+        await self.delete(f"state:{player_id}")
+
+    async def _read_game_state(self, player_id: str) -> Any:
+        """Read a game state hash; MISSING if negatively cached"""
+        fields = await self.redis.hgetall(f"{self.prefix}state:{player_id}")
+        if not fields:
+            return None
+        if MISSING in fields:
+            return MISSING
+        
+        try:
+            return {
+                field.decode(): orjson.loads(value)
+                for field, value in fields.items()
+            }
+        except orjson.JSONDecodeError:
+            await self.delete_game_state(player_id)
+            return None
+
+    async def _write_game_state(
+        self,
+        player_id: str,
+        state: Any,
+        ttl: Optional[int] = None
+    ) -> None:
+        """Replace a game state hash, or mark it MISSING"""
+        key = f"{self.prefix}state:{player_id}"
+        if state == MISSING:
+            mapping = {MISSING: b"1"}
+        else:
+            mapping = {
+                field: orjson.dumps(value)
+                for field, value in state.items()
+            }
+        
+        try:
+            # Replace atomically so no stale fields or marker survive
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.delete(key)
+                pipe.hset(key, mapping=mapping)
+                pipe.expire(key, ttl or self.default_ttl)
+                await pipe.execute()
+        except Exception as e:
+            print(f"Cache storage error: {str(e)}")
+
+    async def get_scenario(
+        self,
+        prompt: str,
+        player_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Get cached scenario for prompt, optionally scoped to a player"""
+        key = self._scenario_key(prompt, player_id)
+        return await self._decode(key, await self._fetch(key), compressed=True)
+
+    async def get_scenario_raw(
+        self,
+        prompt: str,
+        player_id: Optional[str] = None
+    ) -> Optional[bytes]:
+        """Get cached scenario for prompt as stored JSON bytes"""
+        key = self._scenario_key(prompt, player_id)
+        cached = await self._fetch(key)
+        if cached:
+            try:
+                return self._scenario_decompressor.decompress(cached)
+            except zstd.ZstdError:
+                await self._evict(key)
+        return None
+
+    async def store_scenario(
+        self,
+        prompt: str,
+        response: Union[bytes, Dict[str, Any]],
+        ttl: Optional[int] = None,
+        player_id: Optional[str] = None
+    ) -> None:
+        """Store scenario in cache, optionally scoped to a player"""
+        key = self._scenario_key(prompt, player_id)
+        ttl = ttl or self.default_ttl
+        
+        try:
+            await self._store(
+                key,
+                ttl,
+                self._pack_scenario(response)
+            )
+        except Exception as e:
+            print(f"Cache storage error: {str(e)}")
+
+    async def get_scenario_structural(
+        self,
+        template_id: str,
+        slot_values: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Get cached scenario for a template and its structural slot values"""
+        key = self._structural_key(template_id, slot_values)
+        return await self._decode(key, await self._fetch(key), compressed=True)
+
+    async def store_scenario_structural(
+        self,
+        template_id: str,
+        slot_values: Dict[str, Any],
+        response: Dict[str, Any],
+        ttl: Optional[int] = None
+    ) -> None:
+        """Store scenario under its template and structural slot values"""
+        key = self._structural_key(template_id, slot_values)
+        ttl = ttl or self.default_ttl
+        
+        try:
+            await self._store(
+                key,
+                ttl,
+                self._pack_scenario(response)
+            )
+        except Exception as e:
+            print(f"Cache storage error: {str(e)}")
+
+    async def get_player_state(self, player_id: str) -> Optional[Dict[str, Any]]:
+        """Get cached player state"""
+        key = self._generate_key("player", player_id)
+        return await self._decode(key, await self._fetch(key))
+
+    async def get_player_state_raw(self, player_id: str) -> Optional[bytes]:
+        """Get cached player state as stored JSON bytes"""
+        return await self._fetch(self._generate_key("player", player_id))
+
+    async def store_player_state(
+        self,
+        player_id: str,
+        state: Dict[str, Any],
+        ttl: Optional[int] = None
+    ) -> None:
+        """Store player state in cache"""
+        key = self._generate_key("player", player_id)
+        ttl = ttl or self.default_ttl * 24  # Longer TTL for player states
+        
+        try:
+            await self._store(
+                key,
+                ttl,
+                orjson.dumps(state)
+            )
+        except Exception as e:
+            print(f"Cache storage error: {str(e)}")
+
+    async def get_scenario_and_player(
+        self,
+        prompt: str,
+        player_id: str
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Get player's cached scenario and player state in one round trip"""
+        scenario_key = self._scenario_key(prompt, player_id)
+        player_key = self._generate_key("player", player_id)
+        scenario, player = await self._fetch_many(scenario_key, player_key)
+        return (
+            await self._decode(scenario_key, scenario, compressed=True),
+            await self._decode(player_key, player)
+        )
+
+    async def store_scenario_and_player(
+        self,
+        prompt: str,
+        response: Dict[str, Any],
+        player_id: str,
+        state: Dict[str, Any]
+    ) -> None:
+        """Store player's scenario and player state in one round trip"""
+        try:
+            await self._store_many(
+                (
+                    self._scenario_key(prompt, player_id),
+                    self.default_ttl,
+                    self._pack_scenario(response)
+                ),
+                (
+                    self._generate_key("player", player_id),
+                    self.default_ttl * 24,  # Longer TTL for player states
+                    orjson.dumps(state)
+                )
+            )
+        except Exception as e:
+            print(f"Cache storage error: {str(e)}")
+
+    async def invalidate_scenario(
+        self,
+        prompt: str,
+        player_id: Optional[str] = None
+    ) -> None:
+        """Invalidate cached scenario"""
+        key = self._scenario_key(prompt, player_id)
+        await self._evict(key)
+
+    async def invalidate_player_scenarios(self, player_id: str) -> None:
+        """Invalidate every scenario cached for a player"""
+        # Matches the keys _scenario_key generates for this player
+        pattern = f"{self.prefix}scenario_zst:{player_id}:*"
+        try:
+            cursor = 0
+            while True:
+                cursor, keys = await self.redis.scan(
+                    cursor=cursor,
+                    match=pattern,
+                    count=500
+                )
+                if keys:
+                    for key in keys:
+                        self._local_invalidated.pop(key.decode(), None)
+                    # UNLINK frees the values off Redis's main thread
+                    await self.redis.unlink(*keys)
+                if cursor == 0:
+                    break
+        except Exception as e:
+            print(f"Cache invalidation error: {str(e)}")
+
+    async def invalidate_player_state(self, player_id: str) -> None:
+        """Invalidate cached player state"""
+        key = self._generate_key("player", player_id)
+        await self._evict(key)
+
+    def _scenario_key(self, prompt: str, player_id: Optional[str] = None) -> str:
+        """Generate cache key for a scenario prompt"""
+        # The _zst suffix keeps compressed entries apart from plain JSON
+        # ones written before compression. Player-scoped scenarios sit
+        # under the player's id so they can be invalidated together.
+        if player_id is None:
+            return self._generate_key("scenario_zst", prompt)
+        return self._generate_key(f"scenario_zst:{player_id}", prompt)
+
+    def _structural_key(
+        self,
+        template_id: str,
+        slot_values: Dict[str, Any]
+    ) -> str:
+        """Generate cache key from a template id and slot values"""
+        # Sorted keys so slot order does not change the key
+        slots = orjson.dumps(slot_values, option=orjson.OPT_SORT_KEYS)
+        return self._generate_key(
+            "scenario_structural_zst",
+            f"{template_id}:{slots.decode()}"
+        )
+
+    def _generate_key(self, type_: str, identifier: str) -> str:
+        """Generate cache key"""
+        # 128-bit BLAKE2b: fixed 32-char keys for any prompt length,
+        # faster than SHA-256 and without 48-bit truncation collisions
+        hash_value = hashlib.blake2b(
+            identifier.encode(),
+            digest_size=16
+        ).hexdigest()
+        return f"{self.prefix}{type_}:{hash_value}"
+
+    async def close(self):
+        """Close Redis connection"""
+        await self.redis.close()
+
+    async def cleanup_expired(self):
+        """Cleanup expired cache entries"""
+        try:
+            pattern = f"{self.prefix}*"
+            cursor = 0
+            while True:
+                cursor, keys = await self.redis.scan(
+                    cursor=cursor,
+                    match=pattern,
+                    count=100
+                )
+                if keys:
+                    # One round trip for the batch's TTLs and one for the
+                    # DEL, rather than two per key
+                    async with self.redis.pipeline(transaction=False) as pipe:
+                        for key in keys:
+                            pipe.ttl(key)
+                        ttls = await pipe.execute()
+                    
+                    # Everything is written with a TTL and expires on its
+                    # own; only keys left without one (-1) need removing
+                    to_delete = [
+                        key for key, ttl in zip(keys, ttls) if ttl == -1
+                    ]
+                    if to_delete:
+                        await self.redis.delete(*to_delete)
+                if cursor == 0:
+                    break
+        except Exception as e:
+            print(f"Cache cleanup error: {str(e)}")
+
+    async def start_cleanup_task(self, interval: int = 3600):
+        """Start periodic cleanup task"""
+        while True:
+            await self.cleanup_expired()
+            await asyncio.sleep(interval)
+
+# Example usage:
+async def main():
+    cache = CacheService(
+        redis_url="redis://localhost:6379/0",
+        default_ttl=3600,
+        prefix="ethiquest:"
+    )
+    
+    # Store scenario
+    await cache.store_scenario(
+        "sample_prompt",
+        {"title": "Test Scenario", "description": "Test Description"}
+    )
+    
+    # Retrieve scenario
+    scenario = await cache.get_scenario("sample_prompt")
+    print(f"Retrieved scenario: {scenario}")
+    
+    # Cleanup
+    await cache.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
@@ -1,10 +1,13 @@
 from typing import Dict, List, Optional, Tuple
+from bisect import bisect_right
 from datetime import datetime
 import logging
 from dataclasses import dataclass
 import math
 import random
 
+import numpy as np
+
 from ..models.game_state import GameState
 from ..models.player import Player
 from ..models.scenario import Scenario, Decision
@@ -13,6 +16,26 @@ from ..config import Settings
 
 logger = logging.getLogger(__name__)
 
+# Stakeholder weights in a decision's reputation impact
+REPUTATION_WEIGHTS = {
+    'employees': 0.3,
+    'customers': 0.3,
+    'community': 0.2,
+    'environment': 0.1,
+    'investors': 0.1
+}
+
+# Sustainability score lower bounds and the rating from each bound up
+SUSTAINABILITY_THRESHOLDS = (40, 50, 60, 70, 80, 90)
+SUSTAINABILITY_RATINGS = ('D', 'C', 'C+', 'B', 'B+', 'A', 'A+')
+
+# Impact scaling by company size: smaller companies feel decisions more
+COMPANY_SIZE_MODIFIERS = {
+    'small': 1.2,
+    'medium': 1.0,
+    'large': 0.8
+}
+
 @dataclass
 class GameAction:
     """Represents a player's action in the game"""
@@ -25,6 +48,8 @@ class GameAction:
 class GameLogic:
     """Core game mechanics and rules engine"""
 
+    _instance = None
+
     def __init__(
         self,
         settings: Settings,
@@ -38,6 +63,32 @@ class GameLogic:
         self.REPUTATION_MULTIPLIER = 1.5
         self.LEVEL_XP_REQUIREMENT = 1000  # Base XP needed for level up
         self.STAKEHOLDER_MEMORY_DURATION = 5  # Turns stakeholders remember decisions
+        
+        # Stakeholder -> position in the impact and satisfaction vectors
+        self._stakeholder_index = {
+            stakeholder: i
+            for i, stakeholder in enumerate(settings.STAKEHOLDER_TYPES)
+        }
+        self._reputation_weights = np.zeros(len(self._stakeholder_index))
+        for stakeholder, weight in REPUTATION_WEIGHTS.items():
+            if stakeholder in self._stakeholder_index:
+                self._reputation_weights[self._stakeholder_index[stakeholder]] = weight
+
+    @classmethod
+    def get_instance(
+        cls,
+        settings: Settings,
+        pattern_analyzer: PatternAnalyzer
+    ) -> 'GameLogic':
+        """Get shared GameLogic, rebuilt only if its dependencies change"""
+        instance = cls._instance
+        if (
+            instance is None
+            or instance.settings is not settings
+            or instance.pattern_analyzer is not pattern_analyzer
+        ):
+            instance = cls._instance = cls(settings, pattern_analyzer)
+        return instance
 
     async def initialize_game_state(self, player: Player) -> GameState:
         """Create initial game state for new player"""
@@ -98,6 +149,11 @@ class GameLogic:
             )
             updated_state.experience_points += xp_gained
             
+            # Each processed decision is one turn
+            updated_state.metadata['turn'] = (
+                updated_state.metadata.get('turn', 0) + 1
+            )
+            
             # Check for level up
             updated_state = await self._check_level_up(updated_state)
             
@@ -123,27 +179,43 @@ class GameLogic:
         """Calculate the immediate impacts of a decision"""
         impacts = {}
         
-        # Base impacts from scenario
+        # Scatter the decision's stakeholder impacts and the matching
+        # satisfaction levels into vectors over STAKEHOLDER_TYPES
+        n = len(self._stakeholder_index)
+        decision_vec = np.zeros(n)
+        satisfaction = np.zeros(n)
+        involved = []
         for stakeholder, impact in decision.impacts.items():
-            base_impact = impact * scenario.difficulty_level
-            
-            # Modify based on current game state
-            modifier = self._calculate_impact_modifier(
-                stakeholder,
-                game_state
-            )
-            
-            impacts[stakeholder] = base_impact * modifier
+            i = self._stakeholder_index.get(stakeholder)
+            if i is None:
+                # Not a configured stakeholder type; scale it on its own
+                impacts[stakeholder] = (
+                    impact
+                    * scenario.difficulty_level
+                    * self._calculate_impact_modifier(stakeholder, game_state)
+                )
+                continue
+            decision_vec[i] = impact
+            satisfaction[i] = game_state.stakeholder_satisfaction[stakeholder]
+            involved.append((stakeholder, i))
+        
+        # Base impacts from scenario, modified by current game state as in
+        # _calculate_impact_modifier
+        modifier = np.where(
+            satisfaction < 30,
+            1.2,  # Bigger impact when satisfaction is low
+            np.where(satisfaction > 70, 0.8, 1.0)  # Smaller when high
+        ) * COMPANY_SIZE_MODIFIERS[game_state.company_size]
+        scaled = decision_vec * scenario.difficulty_level * modifier
+        for stakeholder, i in involved:
+            impacts[stakeholder] = float(scaled[i])
         
         # Calculate resource impacts
         impacts['financial'] = self._calculate_financial_impact(
             decision,
             game_state
         )
-        impacts['reputation'] = self._calculate_reputation_impact(
-            decision,
-            impacts
-        )
+        impacts['reputation'] = self._calculate_reputation_impact(scaled)
         
         return impacts
 
@@ -152,8 +224,10 @@ class GameLogic:
         game_state: GameState,
         impacts: Dict[str, float]
     ) -> GameState:
-        """Apply calculated impacts to game state"""
-        updated_state = game_state.copy()
+        """Apply calculated impacts to game state, in place"""
+        # No copy: callers replace their state with the returned one, and
+        # submit_decision snapshots the fields it diffs before processing
+        updated_state = game_state
         
         # Update resources
         updated_state.financial_resources += impacts.get('financial', 0)
@@ -199,12 +273,7 @@ class GameLogic:
             base_modifier *= 0.8  # Smaller impact when satisfaction is high
             
         # Consider company size
-        size_modifiers = {
-            'small': 1.2,
-            'medium': 1.0,
-            'large': 0.8
-        }
-        base_modifier *= size_modifiers[game_state.company_size]
+        base_modifier *= COMPANY_SIZE_MODIFIERS[game_state.company_size]
         
         return base_modifier
 
@@ -229,26 +298,10 @@ class GameLogic:
         
         return scaled_impact * market_multiplier
 
-    def _calculate_reputation_impact(
-        self,
-        decision: Decision,
-        impacts: Dict[str, float]
-    ) -> float:
+    def _calculate_reputation_impact(self, stakeholder_impacts: np.ndarray) -> float:
         """Calculate reputation impact based on stakeholder impacts"""
-        # Weight stakeholder impacts for reputation
-        weights = {
-            'employees': 0.3,
-            'customers': 0.3,
-            'community': 0.2,
-            'environment': 0.1,
-            'investors': 0.1
-        }
-        
-        weighted_impact = sum(
-            impacts.get(stakeholder, 0) * weight
-            for stakeholder, weight in weights.items()
-        )
-        
+        # Impacts are indexed like STAKEHOLDER_TYPES, 0 where not involved
+        weighted_impact = float(stakeholder_impacts @ self._reputation_weights)
         return weighted_impact * self.REPUTATION_MULTIPLIER
 
     def _calculate_new_market_share(
@@ -279,20 +332,9 @@ class GameLogic:
         overall_score = (environmental_score * 0.6) + (community_score * 0.4)
         
         # Convert to letter rating
-        if overall_score >= 90:
-            return 'A+'
-        elif overall_score >= 80:
-            return 'A'
-        elif overall_score >= 70:
-            return 'B+'
-        elif overall_score >= 60:
-            return 'B'
-        elif overall_score >= 50:
-            return 'C+'
-        elif overall_score >= 40:
-            return 'C'
-        else:
-            return 'D'
+        return SUSTAINABILITY_RATINGS[
+            bisect_right(SUSTAINABILITY_THRESHOLDS, overall_score)
+        ]
 
     def _calculate_experience_points(
         self,
@@ -342,31 +384,36 @@ class GameLogic:
         impacts: Dict[str, float]
     ) -> GameState:
         """Update stakeholder memories of past decisions"""
-        # Update stakeholder memories (could be used for future decisions)
+        # Update stakeholder memories (could be used for future decisions).
+        # Ages are counted in turns, an integer kept in metadata.
+        turn = game_state.metadata.get('turn', 0)
+        duration = self.STAKEHOLDER_MEMORY_DURATION
+        stakeholder_memories = game_state.metadata.setdefault(
+            'stakeholder_memories',
+            {}
+        )
         for stakeholder in self.settings.STAKEHOLDER_TYPES:
             if stakeholder in impacts:
                 memory = {
                     'decision_type': decision.type,
                     'impact': impacts[stakeholder],
-                    'timestamp': datetime.utcnow()
+                    'turn': turn
                 }
                 
-                if 'stakeholder_memories' not in game_state.metadata:
-                    game_state.metadata['stakeholder_memories'] = {}
-                    
-                if stakeholder not in game_state.metadata['stakeholder_memories']:
-                    game_state.metadata['stakeholder_memories'][stakeholder] = []
-                    
-                memories = game_state.metadata['stakeholder_memories'][stakeholder]
-                memories.append(memory)
-                
-                # Keep only recent memories
-                recent_memories = [
-                    m for m in memories
-                    if (datetime.utcnow() - m['timestamp']).days < self.STAKEHOLDER_MEMORY_DURATION
-                ]
+                memories = stakeholder_memories.setdefault(stakeholder, [])
                 
-                game_state.metadata['stakeholder_memories'][stakeholder] = recent_memories
+                # Keep only recent memories. They are appended oldest
+                # first, so expired ones are a prefix and the scan stops
+                # at the first recent one. Memories recorded before turns
+                # were tracked count as turn 0.
+                expired = 0
+                while (
+                    expired < len(memories)
+                    and turn - memories[expired].get('turn', 0) >= duration
+                ):
+                    expired += 1
+                del memories[:expired]
+                memories.append(memory)
                 
         return game_state
 
@@ -1,8 +1,10 @@
-from fastapi import FastAPI, HTTPException, Depends, WebSocket
+from fastapi import FastAPI, HTTPException, Depends, WebSocket, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional
 import asyncio
 import logging
+import time
 from datetime import datetime
 
 from app.core.ai import AIService, ScenarioGenerator
@@ -22,7 +24,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="EthiQuest API",
     description="Backend API for EthiQuest ethical business simulation game",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware for Flutter Web support
@@ -81,9 +84,10 @@ async def get_player(
     db: Database = Depends(get_db_session)
 ):
     """Get player profile"""
-    cached = await cache_service.get_player_state(player_id)
+    cached = await cache_service.get_player_state_raw(player_id)
     if cached:
-        return Player(**cached)
+        # Serve the stored JSON as-is, without revalidating it
+        return Response(content=cached, media_type="application/json")
         
     player = await db.get_player(player_id)
     if not player:
@@ -129,8 +133,9 @@ async def submit_decision(
         # Update player profile with new patterns
         await db.update_player_patterns(player_id, patterns)
         
-        # Invalidate cache
+        # Invalidate cache, including scenarios built from the old history
         await cache_service.invalidate_player_state(player_id)
+        await cache_service.invalidate_player_scenarios(player_id)
         
         return {"status": "success", "patterns": patterns}
         
@@ -146,27 +151,46 @@ async def generate_scenario(
 ):
     """Generate new scenario for player"""
     try:
-        # Get player state and history
-        player = await db.get_player(player_id)
-        game_state = await db.get_game_state(player_id)
+        # UTC day number: integer division of the epoch clock rather than
+        # formatting a datetime on every request
+        cache_key = f"scenario:{player_id}:{int(time.time()) // 86400}"
         
-        if not player or not game_state:
-            raise HTTPException(status_code=404, detail="Player not found")
-        
-        # Check cache first
-        cache_key = f"scenario:{player_id}:{datetime.now().strftime('%Y%m%d')}"
-        cached = await cache_service.get_scenario(cache_key)
+        # Check cache first; the cached player comes back in the same
+        # round trip
+        cached, cached_player = await cache_service.get_scenario_and_player(
+            cache_key,
+            player_id
+        )
         if cached:
             return ScenarioResponse(**cached)
         
+        # Get player state and history, concurrently when the player
+        # was not cached
+        if cached_player:
+            player = Player(**cached_player)
+            game_state = await db.get_game_state(player_id)
+        else:
+            player, game_state = await asyncio.gather(
+                db.get_player(player_id),
+                db.get_game_state(player_id)
+            )
+        
+        if not player or not game_state:
+            raise HTTPException(status_code=404, detail="Player not found")
+        
         # Generate new scenario
         scenario = await scenario_generator.generate_scenario(
             game_state,
             player
         )
         
-        # Store in cache
-        await cache_service.store_scenario(cache_key, scenario.dict())
+        # Store in cache, refreshing the player entry in the same write
+        await cache_service.store_scenario_and_player(
+            cache_key,
+            scenario.dict(),
+            player_id,
+            player.dict()
+        )
         
         return ScenarioResponse(
             scenario=scenario,
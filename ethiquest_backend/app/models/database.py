@@ -1,9 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy import (
-    Column, Integer, String, Float, JSON, DateTime, ForeignKey, 
+    Column, Integer, String, Float, DateTime, ForeignKey, 
     Boolean, Enum, Text, BigInteger
 )
+from sqlalchemy.dialects.postgresql import JSONB
 import enum
 from datetime import datetime
 import uuid
@@ -42,9 +43,14 @@ class Player(Base):
     industry = Column(String(50))
     
     # Analytics and Patterns
-    learning_patterns = Column(JSON, default=dict)
-    skill_levels = Column(JSON, default=dict)
-    achievement_stats = Column(JSON, default=dict)
+    learning_patterns = Column(JSONB, default=dict)
+    skill_levels = Column(JSONB, default=dict)
+    achievement_stats = Column(JSONB, default=dict)
+    
+    # Decision rollups, maintained on every decision insert
+    recent_avg_success = Column(Float)  # mean of the last 10 rated decisions
+    recent_category_counts = Column(JSONB, default=dict)  # last 5 rated decisions
+    decisions_window_json = Column(JSONB, default=list)  # last 20 rated decisions
     
     # Relationships
     decisions = relationship("Decision", back_populates="player")
@@ -66,15 +72,15 @@ class GameState(Base):
     sustainability_rating = Column(String(2), default="C")
     
     # Stakeholder Satisfaction (0-100)
-    stakeholder_satisfaction = Column(JSON, default=dict)
+    stakeholder_satisfaction = Column(JSONB, default=dict)
     
     # Current Challenges and Events
-    active_challenges = Column(JSON, default=list)
-    ongoing_events = Column(JSON, default=list)
+    active_challenges = Column(JSONB, default=list)
+    ongoing_events = Column(JSONB, default=list)
     
     # Market Position
     market_share = Column(Float, default=0.0)
-    competitor_relations = Column(JSON, default=dict)
+    competitor_relations = Column(JSONB, default=dict)
     
     # Operational Metrics
     operational_efficiency = Column(Float, default=50.0)
@@ -97,9 +103,9 @@ class Decision(Base):
     time_spent = Column(Integer)  # seconds spent deciding
     
     # Impacts and Outcomes
-    immediate_impacts = Column(JSON)
-    long_term_impacts = Column(JSON)
-    stakeholder_reactions = Column(JSON)
+    immediate_impacts = Column(JSONB)
+    long_term_impacts = Column(JSONB)
+    stakeholder_reactions = Column(JSONB)
     
     # Analysis
     ethical_alignment = Column(Float)  # -1 to 1
@@ -120,14 +126,14 @@ class Scenario(Base):
     difficulty_level = Column(Float, nullable=False)
     
     # Scenario Parameters
-    stakeholders_affected = Column(JSON, nullable=False)
-    possible_approaches = Column(JSON, nullable=False)
-    hidden_factors = Column(JSON)
+    stakeholders_affected = Column(JSONB, nullable=False)
+    possible_approaches = Column(JSONB, nullable=False)
+    hidden_factors = Column(JSONB)
     time_pressure = Column(Integer)  # turns until decision needed
     
     # Success Criteria
-    success_metrics = Column(JSON)
-    learning_objectives = Column(JSON)
+    success_metrics = Column(JSONB)
+    learning_objectives = Column(JSONB)
     
     # Metadata
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -148,9 +154,9 @@ class Achievement(Base):
     description = Column(Text)
     
     # Achievement Details
-    criteria_met = Column(JSON)
+    criteria_met = Column(JSONB)
     date_earned = Column(DateTime, default=datetime.utcnow)
-    associated_stats = Column(JSON)
+    associated_stats = Column(JSONB)
     
     player = relationship("Player", back_populates="achievements")
 
@@ -163,14 +169,14 @@ class AnalyticsLog(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
     
     # Analytics Data
-    decision_patterns = Column(JSON)
-    learning_progress = Column(JSON)
-    skill_development = Column(JSON)
-    engagement_metrics = Column(JSON)
+    decision_patterns = Column(JSONB)
+    learning_progress = Column(JSONB)
+    skill_development = Column(JSONB)
+    engagement_metrics = Column(JSONB)
     
     # ML Features
-    feature_vector = Column(JSON)
-    labels = Column(JSON)
+    feature_vector = Column(JSONB)
+    labels = Column(JSONB)
 
 # Database initialization function
 async def init_db(db_url: str):
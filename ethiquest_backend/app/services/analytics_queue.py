@@ -0,0 +1,133 @@
+from arq import Retry, create_pool
+from arq.connections import ArqRedis, RedisSettings
+from typing import Any, Dict
+import logging
+
+from ..core.game.game_logic import GameLogic
+from ..core.analytics.pattern_analyzer import PatternAnalyzer
+from ..config import Settings, get_settings
+from .db_service import DBService
+
+logger = logging.getLogger(__name__)
+
+# Attempts per analytics job before arq records it as failed
+ANALYTICS_JOB_MAX_TRIES = 5
+
+# Seconds to wait before retrying, multiplied by the attempt number
+ANALYTICS_RETRY_DELAY = 5
+
+class AnalyticsQueue:
+    """Enqueues post-decision analytics for the analytics worker"""
+
+    _instance = None
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.pool: ArqRedis = None
+
+    @classmethod
+    async def get_instance(cls) -> 'AnalyticsQueue':
+        """Get singleton instance of AnalyticsQueue"""
+        if cls._instance is None:
+            instance = cls(get_settings())
+            instance.pool = await create_pool(
+                RedisSettings.from_dsn(instance.settings.REDIS_URL)
+            )
+            cls._instance = instance
+        return cls._instance
+
+    async def enqueue_decision_analytics(
+        self,
+        player_id: str,
+        decision_id: str,
+        impacts: Dict[str, Any]
+    ) -> None:
+        """Queue analytics for a recorded decision"""
+        # One job per decision, even if the request is retried
+        await self.pool.enqueue_job(
+            "process_decision_analytics",
+            player_id,
+            decision_id,
+            impacts,
+            _job_id=f"analytics:{decision_id}"
+        )
+
+    async def close(self) -> None:
+        """Close Redis connection"""
+        await self.pool.close()
+
+async def process_decision_analytics(
+    ctx: Dict[str, Any],
+    player_id: str,
+    decision_id: str,
+    impacts: Dict[str, Any]
+) -> None:
+    """Process analytics after decision submission"""
+    services = ctx["services"]
+
+    # Get player's decision history from the primary, which already has
+    # the decision that queued this job
+    decisions = await services["db"].get_player_decisions(
+        player_id,
+        primary=True
+    )
+    decision = next(
+        (d for d in reversed(decisions) if str(d.id) == decision_id),
+        None
+    )
+    if decision is None:
+        logger.warning(
+            "Decision %s for player %s not found, skipping analytics",
+            decision_id,
+            player_id
+        )
+        return
+
+    try:
+        # Analyze patterns and check for achievements
+        patterns = services["pattern_analyzer"].analyze_patterns(decisions)
+        achievements = services["game_logic"].check_achievements(
+            player_id=player_id,
+            decision=decision,
+            impacts=impacts,
+            patterns=patterns
+        )
+
+        # Store patterns, new achievements and the analytics log in a
+        # single transaction
+        await services["db"].write_decision_analytics(
+            player_id=player_id,
+            decision_id=decision.id,
+            patterns=patterns,
+            achievements=achievements or [],
+            impacts=impacts
+        )
+    except Exception as e:
+        logger.error("Error processing decision analytics: %s", e)
+        # arq only retries jobs that raise Retry
+        raise Retry(defer=ctx["job_try"] * ANALYTICS_RETRY_DELAY) from e
+
+    logger.info("Processed analytics for player %s", player_id)
+
+async def startup(ctx: Dict[str, Any]) -> None:
+    """Build the services analytics jobs run against"""
+    settings = get_settings()
+    pattern_analyzer = PatternAnalyzer()
+    ctx["services"] = {
+        "db": await DBService.get_instance(),
+        "pattern_analyzer": pattern_analyzer,
+        "game_logic": GameLogic.get_instance(settings, pattern_analyzer)
+    }
+
+async def shutdown(ctx: Dict[str, Any]) -> None:
+    """Release worker resources"""
+    await ctx["services"]["db"].close()
+
+class WorkerSettings:
+    """arq worker: arq app.services.analytics_queue.WorkerSettings"""
+
+    functions = [process_decision_analytics]
+    on_startup = startup
+    on_shutdown = shutdown
+    redis_settings = RedisSettings.from_dsn(get_settings().REDIS_URL)
+    max_tries = ANALYTICS_JOB_MAX_TRIES
@@ -1,6 +1,13 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import select, update, delete, and_, or_, desc
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine
+)
+from sqlalchemy import (
+    select, update, delete, and_, or_, desc, func, cast, true, Float,
+    literal_column
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from typing import Optional, List, Dict, Any
 import logging
 from datetime import datetime
@@ -20,6 +27,18 @@ from ..config import Settings, get_settings
 
 logger = logging.getLogger(__name__)
 
+# Size of the per-player window of recent rated decisions kept on the player row
+DECISION_WINDOW_SIZE = 20
+
+# Number of most recent rated decisions averaged into the recent success rate
+RECENT_SUCCESS_WINDOW = 10
+
+# Number of most recent rated decisions checked for struggling categories
+RECENT_CATEGORY_WINDOW = 5
+
+# Success rating below which a decision's category counts as a challenge
+CHALLENGE_RATING_THRESHOLD = 70
+
 class DBService:
     """Database service for handling all database operations"""
     
@@ -29,6 +48,8 @@ class DBService:
         self.settings = settings
         self.engine = None
         self.session_factory = None
+        self.read_engine = None
+        self.read_session_factory = None
         self._setup_task = None
         
     @classmethod
@@ -52,19 +73,28 @@ class DBService:
     async def _setup(self):
         """Setup database connection and session factory"""
         try:
-            # Create engine
+            # Create engine (asyncpg driver, pooled connections)
             self.engine = create_async_engine(
                 self.settings.DATABASE_URL,
                 echo=self.settings.DB_ECHO,
-                pool_size=self.settings.DB_POOL_SIZE,
-                max_overflow=self.settings.DB_MAX_OVERFLOW,
-                pool_timeout=self.settings.DB_POOL_TIMEOUT
+                **self.settings.get_database_args()
             )
 
-            # Create session factory
-            self.session_factory = sessionmaker(
+            # Separate pool for read-only queries, so writes and background
+            # work can't starve interactive reads of connections
+            self.read_engine = create_async_engine(
+                self.settings.DATABASE_READ_URL or self.settings.DATABASE_URL,
+                echo=self.settings.DB_ECHO,
+                **self.settings.get_read_database_args()
+            )
+
+            # Create session factories
+            self.session_factory = async_sessionmaker(
                 self.engine,
-                class_=AsyncSession,
+                expire_on_commit=False
+            )
+            self.read_session_factory = async_sessionmaker(
+                self.read_engine,
                 expire_on_commit=False
             )
 
@@ -94,6 +124,18 @@ class DBService:
         finally:
             await session.close()
 
+    @asynccontextmanager
+    async def read_session(self) -> AsyncSession:
+        """Get read-only database session from the read pool"""
+        if self.read_session_factory is None:
+            await self.setup()
+
+        session = self.read_session_factory()
+        try:
+            yield session
+        finally:
+            await session.close()
+
     async def check_health(self) -> bool:
         """Check database health"""
         try:
@@ -114,7 +156,7 @@ class DBService:
 
     async def get_player(self, player_id: str) -> Optional[Player]:
         """Get player by ID"""
-        async with self.session() as session:
+        async with self.read_session() as session:
             result = await session.execute(
                 select(Player).where(Player.id == player_id)
             )
@@ -146,10 +188,15 @@ class DBService:
 
     async def get_game_state(
         self,
-        player_id: str
+        player_id: str,
+        primary: bool = False
     ) -> Optional[GameState]:
-        """Get player's game state"""
-        async with self.session() as session:
+        """
+        Get player's game state.
+        Pass primary=True for read-modify-write through the write pool.
+        """
+        session_scope = self.session() if primary else self.read_session()
+        async with session_scope as session:
             result = await session.execute(
                 select(GameState)
                 .where(GameState.player_id == player_id)
@@ -190,20 +237,79 @@ class DBService:
             )
             session.add(db_decision)
             await session.flush()
+
+            # Maintain the player's decision rollups in the same
+            # transaction, holding the row lock so concurrent inserts
+            # don't lose updates
+            player = await session.get(
+                Player,
+                player_id,
+                with_for_update=True
+            )
+            if player is not None:
+                category = await session.scalar(
+                    select(Scenario.category).where(
+                        Scenario.id == scenario_id
+                    )
+                )
+                self._update_decision_rollups(player, db_decision, category)
+
             return db_decision
 
+    @staticmethod
+    def _update_decision_rollups(
+        player: Player,
+        decision: Decision,
+        category: Optional[str]
+    ) -> None:
+        """Fold a new decision into the player's denormalized rollups"""
+        player.total_decisions = (player.total_decisions or 0) + 1
+
+        # Unrated decisions only count towards the total
+        rating = decision.success_rating
+        if rating is None:
+            return
+
+        # JSONB columns are reassigned so the change is tracked
+        window = list(player.decisions_window_json or [])
+        window.append({"success_rating": rating, "category": category})
+        window = window[-DECISION_WINDOW_SIZE:]
+        player.decisions_window_json = window
+
+        recent = [
+            entry["success_rating"]
+            for entry in window[-RECENT_SUCCESS_WINDOW:]
+        ]
+        player.recent_avg_success = sum(recent) / len(recent)
+
+        counts = {}
+        for entry in window[-RECENT_CATEGORY_WINDOW:]:
+            if entry["category"]:
+                counts[entry["category"]] = counts.get(entry["category"], 0) + 1
+        player.recent_category_counts = counts
+
     async def get_player_decisions(
         self,
         player_id: str,
+        start_date: Optional[datetime] = None,
         limit: Optional[int] = None,
-        offset: Optional[int] = None
+        offset: Optional[int] = None,
+        primary: bool = False
     ) -> List[Decision]:
-        """Get player's decisions"""
-        async with self.session() as session:
+        """
+        Get player's decisions, always ordered oldest first.
+        Analytics helpers rely on this order instead of re-sorting.
+        Pass primary=True to read through the write pool, e.g. right
+        after recording a decision or from background work.
+        """
+        session_scope = self.session() if primary else self.read_session()
+        async with session_scope as session:
             query = select(Decision).where(
                 Decision.player_id == player_id
-            ).order_by(desc(Decision.timestamp))
+            ).order_by(Decision.timestamp)
             
+            if start_date:
+                query = query.where(Decision.timestamp >= start_date)
             if limit:
                 query = query.limit(limit)
             if offset:
@@ -212,6 +318,173 @@ class DBService:
             result = await session.execute(query)
             return result.scalars().all()
 
+    async def get_stakeholder_impact_stats(
+        self,
+        player_id: str,
+        since: Optional[datetime] = None,
+        trend_window: int = 3,
+        critical_threshold: float = 20
+    ) -> Dict[str, Dict[str, Any]]:
+        """Get per-stakeholder impact statistics for a player in one query"""
+        async with self.read_session() as session:
+            # Unpivot each decision's impacts into (stakeholder, impact) rows
+            impact = func.jsonb_each_text(
+                Decision.immediate_impacts
+            ).table_valued("key", "value").alias("impact")
+            impact_value = cast(impact.c.value, Float)
+
+            ranked = (
+                select(
+                    Decision.id,
+                    Decision.timestamp,
+                    impact.c.key.label("stakeholder"),
+                    impact_value.label("impact"),
+                    func.row_number().over(
+                        partition_by=impact.c.key,
+                        order_by=desc(Decision.timestamp)
+                    ).label("rn")
+                )
+                .select_from(Decision)
+                .join(impact, true())
+                .where(Decision.player_id == player_id)
+            )
+            if since:
+                ranked = ranked.where(Decision.timestamp >= since)
+            ranked = ranked.subquery()
+
+            result = await session.execute(
+                select(
+                    ranked.c.stakeholder,
+                    func.avg(ranked.c.impact).label("avg_impact"),
+                    func.avg(ranked.c.impact).filter(
+                        ranked.c.rn <= trend_window
+                    ).label("trend"),
+                    func.jsonb_agg(
+                        aggregate_order_by(
+                            # Keys inlined: jsonb_build_object takes "any",
+                            # so bound keys would have no inferable type
+                            func.jsonb_build_object(
+                                literal_column("'decision_id'"), ranked.c.id,
+                                literal_column("'timestamp'"), ranked.c.timestamp,
+                                literal_column("'impact'"), ranked.c.impact
+                            ),
+                            ranked.c.timestamp
+                        )
+                    ).filter(
+                        func.abs(ranked.c.impact) >= critical_threshold
+                    ).label("critical_events")
+                ).group_by(ranked.c.stakeholder)
+            )
+            return {
+                row.stakeholder: {
+                    "avg_impact": row.avg_impact,
+                    "trend": row.trend or 0.0,
+                    "critical_events": row.critical_events or []
+                }
+                for row in result
+            }
+
+    async def get_player_decision_rollups(
+        self,
+        player_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """Get the denormalized decision rollups stored on the player row"""
+        async with self.read_session() as session:
+            result = await session.execute(
+                select(
+                    Player.total_decisions,
+                    Player.recent_avg_success,
+                    Player.recent_category_counts,
+                    Player.decisions_window_json
+                ).where(Player.id == player_id)
+            )
+            row = result.first()
+            if row is None:
+                return None
+            return {
+                "total_count": row.total_decisions or 0,
+                "recent_avg_success": row.recent_avg_success or 0.0,
+                "recent_category_counts": row.recent_category_counts or {},
+                "decisions_window": row.decisions_window_json or []
+            }
+
+    async def get_player_decision_stats(
+        self,
+        player_id: str,
+        since: Optional[datetime] = None,
+        recent_window: int = RECENT_SUCCESS_WINDOW,
+        challenge_window: int = RECENT_CATEGORY_WINDOW
+    ) -> Dict[str, Any]:
+        """Get aggregate decision statistics over the recent rated window"""
+        if since is None:
+            # Served from the rollups kept on the player row
+            rollups = await self.get_player_decision_rollups(player_id)
+            return self._summarize_decision_window(
+                rollups["decisions_window"] if rollups else [],
+                rollups["total_count"] if rollups else 0,
+                recent_window,
+                challenge_window
+            )
+
+        async with self.read_session() as session:
+            in_range = and_(
+                Decision.player_id == player_id,
+                Decision.timestamp >= since
+            )
+            total_count = await session.scalar(
+                select(func.count()).select_from(Decision).where(in_range)
+            )
+            # Same window the player row keeps, restricted to the range
+            result = await session.execute(
+                select(Decision.success_rating, Scenario.category)
+                .join(Scenario, Scenario.id == Decision.scenario_id)
+                .where(and_(in_range, Decision.success_rating.is_not(None)))
+                .order_by(desc(Decision.timestamp))
+                .limit(DECISION_WINDOW_SIZE)
+            )
+            window = [
+                {"success_rating": row.success_rating, "category": row.category}
+                for row in reversed(result.all())
+            ]
+            return self._summarize_decision_window(
+                window,
+                total_count,
+                recent_window,
+                challenge_window
+            )
+
+    @staticmethod
+    def _summarize_decision_window(
+        window: List[Dict[str, Any]],
+        total_count: int,
+        recent_window: int,
+        challenge_window: int
+    ) -> Dict[str, Any]:
+        """Reduce an oldest-first window of rated decisions to statistics"""
+        ratings = [entry["success_rating"] for entry in window]
+        recent = ratings[-recent_window:]
+
+        # Early/recent comparison windows: half the window, capped
+        improvement_window = min(recent_window, len(ratings) // 2)
+        if improvement_window:
+            early_avg = sum(ratings[:improvement_window]) / improvement_window
+            recent_avg = sum(ratings[-improvement_window:]) / improvement_window
+        else:
+            early_avg = recent_avg = 0.0
+
+        return {
+            "total_count": total_count,
+            "avg_recent_success": sum(recent) / len(recent) if recent else 0.0,
+            "avg_recent_window_success": recent_avg,
+            "avg_early_window_success": early_avg,
+            "recent_challenge_categories": list(dict.fromkeys(
+                entry["category"]
+                for entry in window[-challenge_window:]
+                if entry["category"]
+                and entry["success_rating"] < CHALLENGE_RATING_THRESHOLD
+            ))
+        }
+
     # Scenario Operations
     async def create_scenario(self, scenario: Scenario) -> Scenario:
         """Create new scenario"""
@@ -225,7 +498,7 @@ class DBService:
         scenario_id: str
     ) -> Optional[Scenario]:
         """Get scenario by ID"""
-        async with self.session() as session:
+        async with self.read_session() as session:
             result = await session.execute(
                 select(Scenario).where(Scenario.id == scenario_id)
             )
@@ -237,7 +510,7 @@ class DBService:
         limit: Optional[int] = None
     ) -> List[Scenario]:
         """Get scenarios player has encountered"""
-        async with self.session() as session:
+        async with self.read_session() as session:
             query = (
                 select(Scenario)
                 .join(Decision)
@@ -251,6 +524,20 @@ class DBService:
             result = await session.execute(query)
             return result.scalars().all()
 
+    async def get_completed_scenarios(
+        self,
+        player_id: str
+    ) -> List[Scenario]:
+        """Get distinct scenarios player has made decisions on"""
+        async with self.read_session() as session:
+            result = await session.execute(
+                select(Scenario)
+                .join(Decision)
+                .where(Decision.player_id == player_id)
+                .distinct()
+            )
+            return result.scalars().all()
+
     # Achievement Operations
     async def create_achievement(
         self,
@@ -274,7 +561,7 @@ class DBService:
         player_id: str
     ) -> List[Achievement]:
         """Get player's achievements"""
-        async with self.session() as session:
+        async with self.read_session() as session:
             result = await session.execute(
                 select(Achievement)
                 .where(Achievement.player_id == player_id)
@@ -301,6 +588,36 @@ class DBService:
             await session.flush()
             return log
 
+    async def write_decision_analytics(
+        self,
+        player_id: str,
+        decision_id: str,
+        patterns: Dict[str, Any],
+        achievements: List[Dict[str, Any]],
+        impacts: Dict[str, Any]
+    ) -> None:
+        """
+        Persist post-decision analytics in one transaction: updated
+        patterns, any new achievements and the analytics log entry.
+        """
+        async with self.session() as session:
+            await session.execute(
+                update(Player)
+                .where(Player.id == player_id)
+                .values(learning_patterns=patterns)
+            )
+            session.add_all([
+                Achievement(player_id=player_id, **achievement)
+                for achievement in achievements
+            ])
+            session.add(AnalyticsLog(
+                player_id=player_id,
+                timestamp=datetime.utcnow(),
+                decision_patterns=patterns,
+                feature_vector=impacts,
+                labels={"decision_id": decision_id}
+            ))
+
     async def get_player_analytics(
         self,
         player_id: str,
@@ -309,7 +626,7 @@ class DBService:
         end_date: Optional[datetime] = None
     ) -> List[AnalyticsLog]:
         """Get player's analytics logs"""
-        async with self.session() as session:
+        async with self.read_session() as session:
             query = select(AnalyticsLog).where(
                 AnalyticsLog.player_id == player_id
             )
@@ -387,9 +704,11 @@ class DBService:
             }
 
     async def close(self):
-        """Close database connection"""
+        """Close database connections"""
         if self.engine:
             await self.engine.dispose()
+        if self.read_engine:
+            await self.read_engine.dispose()
 
 # Initialize global database service
 db_service = None
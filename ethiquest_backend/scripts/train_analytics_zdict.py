@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+from pathlib import Path
+import logging
+
+import zstandard as zstd
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def load_samples(paths: list) -> list:
+    """Load sample payloads from JSON files or JSON-lines files"""
+    samples = []
+    for path in map(Path, paths):
+        if path.suffix == '.jsonl':
+            samples.extend(
+                line.encode() for line in path.read_text().splitlines()
+                if line.strip()
+            )
+        else:
+            samples.append(path.read_bytes())
+    return samples
+
+def main():
+    """Train a zstd dictionary from sample PlayerAnalytics payloads"""
+    parser = argparse.ArgumentParser(
+        description='Train the analytics cache compression dictionary'
+    )
+    parser.add_argument(
+        'samples',
+        nargs='+',
+        help='PlayerAnalytics JSON files (.json) or JSON lines (.jsonl)'
+    )
+    parser.add_argument(
+        '--output',
+        default='analytics.zdict',
+        help='Dictionary output path'
+    )
+    parser.add_argument(
+        '--size',
+        type=int,
+        default=16 * 1024,
+        help='Dictionary size in bytes'
+    )
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples)
+    if len(samples) < 10:
+        logger.error("Need at least 10 sample payloads, got %d", len(samples))
+        sys.exit(1)
+
+    dictionary = zstd.train_dictionary(args.size, samples)
+    Path(args.output).write_bytes(dictionary.as_bytes())
+    logger.info(
+        "Wrote dictionary %d (%d bytes) trained on %d samples to %s",
+        dictionary.dict_id(),
+        len(dictionary),
+        len(samples),
+        args.output
+    )
+
+if __name__ == '__main__':
+    main()
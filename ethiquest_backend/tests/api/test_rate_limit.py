@@ -0,0 +1,43 @@
+import pytest
+import uuid
+
+from app.api.middleware.rate_limit import RateLimitManager
+
+class TestRateLimitManager:
+    """Test suite for the fixed window rate limiter"""
+
+    @pytest.mark.asyncio
+    async def test_fixed_window_limit(self, test_rate_limit_manager: RateLimitManager):
+        """Test requests beyond the limit are rejected within a window"""
+        # Arrange
+        client_id = str(uuid.uuid4())
+        limit = 3
+
+        # Act
+        results = [
+            await test_rate_limit_manager.check_rate_limit(client_id, limit, window=3600)
+            for _ in range(limit + 1)
+        ]
+
+        # Assert
+        assert [allowed for allowed, _ in results] == [True, True, True, False]
+        assert [info["remaining"] for _, info in results] == [2, 1, 0, 0]
+        assert all(info["reset"] > info["now"] for _, info in results)
+
+    @pytest.mark.asyncio
+    async def test_window_counter_expires_with_window(
+        self,
+        test_rate_limit_manager: RateLimitManager
+    ):
+        """Test the window counter is created with an expiry at the window end"""
+        # Arrange
+        client_id = str(uuid.uuid4())
+
+        # Act
+        _, info = await test_rate_limit_manager.check_rate_limit(client_id, 10, window=3600)
+
+        # Assert
+        keys = await test_rate_limit_manager.redis.keys(f"ratelimit:{client_id}:*")
+        assert len(keys) == 1
+        ttl_ms = await test_rate_limit_manager.redis.pttl(keys[0])
+        assert 0 < ttl_ms <= info["reset_ms"] - info["now"] * 1000
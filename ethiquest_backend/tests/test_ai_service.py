@@ -0,0 +1,116 @@
+import pytest
+import asyncio
+from typing import List, Optional
+
+import orjson
+from cachetools import TTLCache
+
+from app.core.ai.ai_service import AIProvider, AIService
+
+SCENARIO = orjson.dumps({
+    "scenario_title": "Supplier audit",
+    "description": "An audit finds unsafe conditions at a key supplier.",
+    "stakeholders_affected": ["employees", "community"],
+    "approaches": [{"id": "a", "text": "Suspend the supplier"}]
+}).decode()
+
+class ScriptedProvider(AIProvider):
+    """Provider answering each call with the next scripted response"""
+
+    def __init__(self, responses: List[str], delay: float = 0):
+        super().__init__()
+        self.responses = responses
+        self.delay = delay
+        self.calls = 0
+
+    async def generate_completion(
+        self,
+        prompt: str,
+        system: Optional[str] = None
+    ) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.responses[min(self.calls, len(self.responses)) - 1]
+
+class TestAIService:
+    """Test suite for scenario generation sharing and refusal"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_prompts_share_one_call(self):
+        """Test concurrent identical prompts make a single provider call"""
+        # Arrange
+        provider = ScriptedProvider([SCENARIO], delay=0.1)
+        service = AIService(primary_provider=provider)
+
+        # Act
+        responses = await asyncio.gather(*[
+            service.generate_scenario("Generate a supplier scenario")
+            for _ in range(5)
+        ])
+        again = await service.generate_scenario("Generate a supplier scenario")
+
+        # Assert
+        assert provider.calls == 1
+        assert all(response is responses[0] for response in responses)
+        assert responses[0].scenario_title == "Supplier audit"
+        assert again is responses[0]
+        assert service._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_keeps_shared_generation(self):
+        """Test cancelling one caller does not fail the others"""
+        # Arrange
+        provider = ScriptedProvider([SCENARIO], delay=0.1)
+        service = AIService(primary_provider=provider)
+        first = asyncio.create_task(service.generate_scenario("Generate a supplier scenario"))
+        second = asyncio.create_task(service.generate_scenario("Generate a supplier scenario"))
+        await asyncio.sleep(0.01)
+
+        # Act
+        first.cancel()
+        response = await second
+
+        # Assert
+        assert first.cancelled()
+        assert response.scenario_title == "Supplier audit"
+        assert provider.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_malformed_response_refused_for_ttl(self):
+        """Test a prompt with an unparseable response is refused until expiry"""
+        # Arrange
+        provider = ScriptedProvider(["not json", SCENARIO])
+        service = AIService(primary_provider=provider)
+        service._malformed = TTLCache(maxsize=100, ttl=0.1)
+
+        # Act
+        with pytest.raises(ValueError):
+            await service.generate_scenario("Generate a supplier scenario")
+        with pytest.raises(ValueError):
+            await service.generate_scenario("Generate a supplier scenario")
+        refused_calls = provider.calls
+        await asyncio.sleep(0.2)
+        response = await service.generate_scenario("Generate a supplier scenario")
+
+        # Assert
+        assert refused_calls == 1
+        assert provider.calls == 2
+        assert response.scenario_title == "Supplier audit"
+
+    @pytest.mark.asyncio
+    async def test_malformed_backup_response_refused(self):
+        """Test an unparseable backup response also refuses the prompt"""
+        # Arrange
+        primary = ScriptedProvider(['{"description": "incomplete"}'])
+        backup = ScriptedProvider(["not json"])
+        service = AIService(primary_provider=primary, backup_provider=backup)
+
+        # Act
+        with pytest.raises(RuntimeError):
+            await service.generate_scenario("Generate a supplier scenario")
+        with pytest.raises(ValueError):
+            await service.generate_scenario("Generate a supplier scenario")
+
+        # Assert
+        assert primary.calls == 1
+        assert backup.calls == 1
@@ -0,0 +1,142 @@
+import pytest
+import asyncio
+
+from cachetools import TTLCache
+
+from app.core.cache.cache_service import CacheService, MISSING
+
+class TestCacheService:
+    """Test suite for cache service read-through and local caching"""
+
+    @pytest.mark.asyncio
+    async def test_get_or_load_coalesces_misses(self, test_cache_service: CacheService):
+        """Test concurrent misses share a single load"""
+        # Arrange
+        calls = 0
+
+        async def loader() -> bytes:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.1)
+            return b'{"id": "player_1"}'
+
+        # Act
+        results = await asyncio.gather(*[
+            test_cache_service.get_or_load("player:player_1", loader)
+            for _ in range(5)
+        ])
+
+        # Assert
+        assert calls == 1
+        assert results == [b'{"id": "player_1"}'] * 5
+        assert not await test_cache_service.redis.exists("test:lock:player:player_1")
+
+    @pytest.mark.asyncio
+    async def test_get_or_load_negative_caching(self, test_cache_service: CacheService):
+        """Test unknown keys are cached as missing"""
+        # Arrange
+        calls = 0
+
+        async def loader() -> None:
+            nonlocal calls
+            calls += 1
+            return None
+
+        # Act
+        first = await test_cache_service.get_or_load("player:unknown", loader, missing_ttl=30)
+        second = await test_cache_service.get_or_load("player:unknown", loader, missing_ttl=30)
+
+        # Assert
+        assert first is None
+        assert second is None
+        assert calls == 1
+        assert await test_cache_service.redis.get("test:player:unknown") == MISSING
+        assert 0 < await test_cache_service.redis.ttl("test:player:unknown") <= 30
+
+    @pytest.mark.asyncio
+    async def test_local_cache_write_through(self, test_cache_service: CacheService):
+        """Test writes fill the local cache and reads are served from it"""
+        # Act
+        await test_cache_service.set("analytics:player_1", b'{"id": "player_1"}')
+        # Remove the Redis copy behind the service's back
+        await test_cache_service.redis.delete("test:analytics:player_1")
+
+        # Assert
+        assert test_cache_service._local["test:analytics:player_1"] == b'{"id": "player_1"}'
+        assert await test_cache_service.get_raw("analytics:player_1") == b'{"id": "player_1"}'
+
+    @pytest.mark.asyncio
+    async def test_delete_evicts_local_cache(self, test_cache_service: CacheService):
+        """Test deletes remove both the Redis and local copies"""
+        # Arrange
+        await test_cache_service.set("analytics:player_1", b'{"id": "player_1"}')
+
+        # Act
+        await test_cache_service.delete("analytics:player_1")
+
+        # Assert
+        assert "test:analytics:player_1" not in test_cache_service._local
+        assert await test_cache_service.get_raw("analytics:player_1") is None
+
+    @pytest.mark.asyncio
+    async def test_missing_not_cached_locally(self, test_cache_service: CacheService):
+        """Test negative entries are read from Redis, never the local cache"""
+        # Arrange
+        async def loader() -> None:
+            return None
+
+        await test_cache_service.get_or_load("analytics:unknown", loader)
+        await test_cache_service.get_raw("analytics:unknown")
+
+        # Act: another worker stores the value over the marker
+        await test_cache_service.redis.set("test:analytics:unknown", b'{"id": "unknown"}')
+        values = await test_cache_service._fetch_many("test:analytics:unknown")
+
+        # Assert
+        assert values == [b'{"id": "unknown"}']
+        assert MISSING not in test_cache_service._local.values()
+
+    @pytest.mark.asyncio
+    async def test_invalidated_keys_expire_locally_first(
+        self,
+        test_cache_service: CacheService
+    ):
+        """Test invalidated key types are held locally only briefly"""
+        # Arrange
+        test_cache_service._local_invalidated = TTLCache(maxsize=100, ttl=0.1)
+        await test_cache_service.set("player:player_1", b'{"level": 1}')
+        await test_cache_service.set("analytics:player_1", b'{"level": 1}')
+
+        # Act: another worker deletes both keys
+        await test_cache_service.redis.delete(
+            "test:player:player_1",
+            "test:analytics:player_1"
+        )
+        before = await test_cache_service.get_raw("player:player_1")
+        await asyncio.sleep(0.2)
+        after = await test_cache_service._fetch_many(
+            "test:player:player_1",
+            "test:analytics:player_1"
+        )
+
+        # Assert
+        assert before == b'{"level": 1}'
+        assert after == [None, b'{"level": 1}']
+        assert "test:player:player_1" not in test_cache_service._local
+
+    @pytest.mark.asyncio
+    async def test_invalidate_player_scenarios(self, test_cache_service: CacheService):
+        """Test a player's cached scenarios are invalidated together"""
+        # Arrange
+        payload = b'{"scenario": {"title": "Supplier audit"}}'
+        await test_cache_service.store_scenario("daily:1", payload, player_id="player_1")
+        await test_cache_service.store_scenario("daily:1", payload, player_id="player_2")
+
+        # Act
+        cached = await test_cache_service.get_scenario_raw("daily:1", player_id="player_1")
+        await test_cache_service.invalidate_player_scenarios("player_1")
+
+        # Assert
+        assert cached == payload
+        assert await test_cache_service.get_scenario_raw("daily:1", player_id="player_1") is None
+        assert await test_cache_service.get_scenario_raw("daily:1", player_id="player_2") == payload
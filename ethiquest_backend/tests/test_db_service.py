@@ -6,6 +6,16 @@ from typing import Dict, Any
 from app.services.db_service import DBService
 from app.models.database import Player, GameState, Scenario, Decision, Achievement
 
+def _decision_data(timestamp: datetime, success_rating: float) -> Dict[str, Any]:
+    """Build decision fields with the given time and rating"""
+    return {
+        "timestamp": timestamp,
+        "choice_made": "approach_1",
+        "time_spent": 45,
+        "immediate_impacts": {"financial": -10},
+        "success_rating": success_rating
+    }
+
 class TestDBService:
     """Test suite for database service operations"""
 
@@ -177,6 +187,93 @@ class TestDBService:
         assert len(decisions) > 0
         assert decisions[0].player_id == sample_player.id
 
+    @pytest.mark.asyncio
+    async def test_get_player_decisions_oldest_first(
+        self,
+        test_db_service: DBService,
+        sample_player: Player,
+        sample_scenario: Scenario
+    ):
+        """Test player decisions are returned oldest first"""
+        # Arrange: insert out of chronological order
+        now = datetime.utcnow()
+        for hours_ago in (1, 3, 2):
+            await test_db_service.create_decision(
+                player_id=sample_player.id,
+                scenario_id=sample_scenario.id,
+                decision=_decision_data(now - timedelta(hours=hours_ago), 75.0)
+            )
+
+        # Act
+        decisions = await test_db_service.get_player_decisions(sample_player.id)
+
+        # Assert
+        timestamps = [d.timestamp for d in decisions]
+        assert timestamps == sorted(timestamps)
+        assert timestamps[0] == now - timedelta(hours=3)
+
+    @pytest.mark.asyncio
+    async def test_decision_rollups(
+        self,
+        test_db_service: DBService,
+        sample_player: Player,
+        sample_scenario: Scenario
+    ):
+        """Test decision rollups skip unrated decisions and keep recent windows"""
+        # Arrange
+        now = datetime.utcnow()
+        ratings = [90.0, None, 40.0, 80.0, 60.0, 50.0, 65.0]
+
+        # Act
+        for i, rating in enumerate(ratings):
+            await test_db_service.create_decision(
+                player_id=sample_player.id,
+                scenario_id=sample_scenario.id,
+                decision=_decision_data(now - timedelta(minutes=len(ratings) - i), rating)
+            )
+        rollups = await test_db_service.get_player_decision_rollups(sample_player.id)
+
+        # Assert
+        rated = [r for r in ratings if r is not None]
+        assert rollups["total_count"] == len(ratings)
+        assert [e["success_rating"] for e in rollups["decisions_window"]] == rated
+        assert rollups["recent_avg_success"] == pytest.approx(sum(rated) / len(rated))
+        # Category counts cover the last 5 rated decisions only
+        assert rollups["recent_category_counts"] == {"employee_relations": 5}
+
+    @pytest.mark.asyncio
+    async def test_get_player_decision_stats(
+        self,
+        test_db_service: DBService,
+        sample_player: Player,
+        sample_scenario: Scenario
+    ):
+        """Test rollup and time-bounded decision stats agree"""
+        # Arrange
+        now = datetime.utcnow()
+        ratings = [50.0, 60.0, None, 80.0, 90.0]
+        for i, rating in enumerate(ratings):
+            await test_db_service.create_decision(
+                player_id=sample_player.id,
+                scenario_id=sample_scenario.id,
+                decision=_decision_data(now - timedelta(minutes=len(ratings) - i), rating)
+            )
+
+        # Act
+        from_rollups = await test_db_service.get_player_decision_stats(sample_player.id)
+        in_range = await test_db_service.get_player_decision_stats(
+            sample_player.id,
+            since=now - timedelta(days=1)
+        )
+
+        # Assert
+        assert from_rollups == in_range
+        assert from_rollups["total_count"] == 5
+        assert from_rollups["avg_recent_success"] == pytest.approx(70.0)
+        assert from_rollups["avg_early_window_success"] == pytest.approx(55.0)
+        assert from_rollups["avg_recent_window_success"] == pytest.approx(85.0)
+        assert from_rollups["recent_challenge_categories"] == ["employee_relations"]
+
     @pytest.mark.asyncio
     async def test_create_achievement(
         self,
@@ -266,6 +363,47 @@ class TestDBService:
         assert logs[0].player_id == sample_player.id
         assert logs[0].data == mock_analytics_data
 
+    @pytest.mark.asyncio
+    async def test_write_decision_analytics(
+        self,
+        test_db_service: DBService,
+        sample_player: Player,
+        mock_analytics_data: Dict[str, Any]
+    ):
+        """Test post-decision analytics are persisted together"""
+        # Arrange
+        patterns = mock_analytics_data["decision_patterns"]
+        achievements = [{
+            "achievement_type": "milestone",
+            "name": "First Decision",
+            "description": "Made first decision",
+            "criteria_met": {"decisions": 1}
+        }]
+        impacts = {"financial": -10, "reputation": 5}
+        decision_id = str(uuid.uuid4())
+
+        # Act
+        await test_db_service.write_decision_analytics(
+            player_id=sample_player.id,
+            decision_id=decision_id,
+            patterns=patterns,
+            achievements=achievements,
+            impacts=impacts
+        )
+
+        # Assert
+        player = await test_db_service.get_player(sample_player.id)
+        assert player.learning_patterns == patterns
+
+        stored_achievements = await test_db_service.get_player_achievements(sample_player.id)
+        assert [a.name for a in stored_achievements] == ["First Decision"]
+
+        logs = await test_db_service.get_player_analytics(sample_player.id)
+        assert len(logs) == 1
+        assert logs[0].decision_patterns == patterns
+        assert logs[0].feature_vector == impacts
+        assert logs[0].labels == {"decision_id": decision_id}
+
     @pytest.mark.asyncio
     async def test_bulk_operations(
         self,
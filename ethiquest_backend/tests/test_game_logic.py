@@ -0,0 +1,206 @@
+import pytest
+from types import SimpleNamespace
+from typing import Dict
+
+import numpy as np
+
+from app.config import get_settings
+
+# game_logic imports the game_state, player and scenario models, which are
+# not in this tree yet
+game_logic = pytest.importorskip(
+    "app.core.game.game_logic",
+    reason="game models (app.core.models) are not available"
+)
+
+def _game_state(satisfaction: Dict[str, float], **fields) -> SimpleNamespace:
+    """Build the game state attributes GameLogic reads and writes"""
+    state = {
+        "stakeholder_satisfaction": dict(satisfaction),
+        "company_size": "small",
+        "market_share": 10.0,
+        "financial_resources": 1_000_000,
+        "reputation": 50.0,
+        "sustainability_rating": "C",
+        "metadata": {}
+    }
+    state.update(fields)
+    return SimpleNamespace(**state)
+
+def _reference_rating(score: float) -> str:
+    """Sustainability rating as the original if/elif ladder computed it"""
+    if score >= 90:
+        return 'A+'
+    elif score >= 80:
+        return 'A'
+    elif score >= 70:
+        return 'B+'
+    elif score >= 60:
+        return 'B'
+    elif score >= 50:
+        return 'C+'
+    elif score >= 40:
+        return 'C'
+    return 'D'
+
+@pytest.fixture
+def logic():
+    """Create game logic on the default settings"""
+    return game_logic.GameLogic(get_settings(), pattern_analyzer=None)
+
+class TestGameLogic:
+    """Test suite for decision impact and stakeholder memory rules"""
+
+    def test_decision_impacts_hand_computed(self, logic):
+        """Test impacts scale by difficulty, satisfaction and company size"""
+        # Arrange
+        state = _game_state({
+            "employees": 20,  # low satisfaction: x1.2
+            "customers": 80,  # high satisfaction: x0.8
+            "investors": 50,
+            "community": 50,
+            "environment": 50
+        })
+        decision = SimpleNamespace(impacts={"employees": 10, "customers": -5})
+        scenario = SimpleNamespace(difficulty_level=0.5)
+
+        # Act
+        impacts = logic._calculate_decision_impacts(decision, scenario, state)
+
+        # Assert: small company x1.2 on top of the satisfaction modifier
+        assert impacts["employees"] == pytest.approx(10 * 0.5 * 1.2 * 1.2)
+        assert impacts["customers"] == pytest.approx(-5 * 0.5 * 0.8 * 1.2)
+        # (7.2 * 0.3 + -2.4 * 0.3) * 1.5
+        assert impacts["reputation"] == pytest.approx(2.16)
+        assert impacts["financial"] == 0
+
+    @pytest.mark.parametrize("satisfaction", [0, 29.9, 30, 50, 70, 70.1, 100])
+    @pytest.mark.parametrize("company_size", ["small", "medium", "large"])
+    def test_decision_impacts_match_scalar_modifier(
+        self,
+        logic,
+        satisfaction: float,
+        company_size: str
+    ):
+        """Test vectorized impacts equal the per-stakeholder modifier path"""
+        # Arrange
+        stakeholders = get_settings().STAKEHOLDER_TYPES
+        state = _game_state(
+            {stakeholder: satisfaction for stakeholder in stakeholders},
+            company_size=company_size
+        )
+        decision = SimpleNamespace(impacts={
+            stakeholder: 4.0 * (i + 1) - 10
+            for i, stakeholder in enumerate(stakeholders)
+        })
+        scenario = SimpleNamespace(difficulty_level=0.7)
+
+        # Act
+        impacts = logic._calculate_decision_impacts(decision, scenario, state)
+
+        # Assert
+        expected = {
+            stakeholder: impact * 0.7 * logic._calculate_impact_modifier(stakeholder, state)
+            for stakeholder, impact in decision.impacts.items()
+        }
+        for stakeholder, value in expected.items():
+            assert impacts[stakeholder] == pytest.approx(value)
+        assert impacts["reputation"] == pytest.approx(
+            sum(
+                value * game_logic.REPUTATION_WEIGHTS[stakeholder]
+                for stakeholder, value in expected.items()
+            ) * logic.REPUTATION_MULTIPLIER
+        )
+
+    def test_reputation_impact_ignores_uninvolved_stakeholders(self, logic):
+        """Test the reputation dot product only counts weighted stakeholders"""
+        # Arrange: employees and environment only
+        scaled = np.zeros(len(get_settings().STAKEHOLDER_TYPES))
+        index = {s: i for i, s in enumerate(get_settings().STAKEHOLDER_TYPES)}
+        scaled[index["employees"]] = 10.0
+        scaled[index["environment"]] = -20.0
+
+        # Act
+        reputation = logic._calculate_reputation_impact(scaled)
+
+        # Assert: (10 * 0.3 + -20 * 0.1) * 1.5
+        assert reputation == pytest.approx(1.5)
+
+    @pytest.mark.asyncio
+    async def test_apply_impacts_hand_computed(self, logic):
+        """Test impacts update resources, clamp satisfaction and rerate"""
+        # Arrange
+        state = _game_state({
+            "employees": 95,
+            "customers": 80,
+            "investors": 50,
+            "community": 50,
+            "environment": 50
+        })
+        impacts = {
+            "employees": 10.0,
+            "customers": -2.4,
+            "reputation": 2.16,
+            "financial": 10_000.0
+        }
+
+        # Act
+        updated = await logic._apply_impacts(state, impacts)
+
+        # Assert
+        assert updated is state
+        assert updated.financial_resources == 1_010_000
+        assert updated.reputation == pytest.approx(52.16)
+        assert updated.stakeholder_satisfaction["employees"] == 100  # clamped
+        assert updated.stakeholder_satisfaction["customers"] == pytest.approx(77.6)
+        assert updated.stakeholder_satisfaction["investors"] == 50
+        # 10 + (2.16 * 0.1 + 10_000 / 1_010_000) * 0.5
+        assert updated.market_share == pytest.approx(10 + (0.216 + 10_000 / 1_010_000) * 0.5)
+        # 50 * 0.6 + 50 * 0.4 = 50
+        assert updated.sustainability_rating == "C+"
+
+    @pytest.mark.parametrize(
+        "score",
+        [0, 39.9, 40, 45, 49.9, 50, 59.9, 60, 69.9, 70, 79.9, 80, 89.9, 90, 100]
+    )
+    def test_sustainability_rating_matches_thresholds(self, logic, score: float):
+        """Test bisected ratings equal the original threshold ladder"""
+        # Arrange
+        state = _game_state({"environment": score, "community": score})
+
+        # Act
+        rating = logic._calculate_sustainability_rating(state)
+
+        # Assert
+        assert rating == _reference_rating(score * 0.6 + score * 0.4)
+
+    def test_stakeholder_memories_expire_by_turn(self, logic):
+        """Test memories older than the memory duration are dropped"""
+        # Arrange
+        state = _game_state({}, metadata={
+            "stakeholder_memories": {
+                # Recorded before turns were tracked; counts as turn 0
+                "employees": [{"decision_type": "legacy", "impact": 1.0}]
+            }
+        })
+        decision = SimpleNamespace(type="ethical")
+
+        # Act
+        for turn in range(1, 8):
+            state.metadata["turn"] = turn
+            logic._update_stakeholder_memories(
+                state,
+                decision,
+                {"employees": float(turn), "customers": float(turn)}
+            )
+
+        # Assert: at turn 7, memories from turn 2 and earlier have expired
+        memories = state.metadata["stakeholder_memories"]
+        assert [m["turn"] for m in memories["employees"]] == [3, 4, 5, 6, 7]
+        assert [m["turn"] for m in memories["customers"]] == [3, 4, 5, 6, 7]
+        assert memories["employees"][-1] == {
+            "decision_type": "ethical",
+            "impact": 7.0,
+            "turn": 7
+        }
+        assert "investors" not in memories
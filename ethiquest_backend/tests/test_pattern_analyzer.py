@@ -0,0 +1,202 @@
+import pytest
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import numpy as np
+
+from app.core.analytics.pattern_analyzer import (
+    Decision,
+    PatternAnalyzer,
+    EMPTY_STAKEHOLDER_SIMILARITY
+)
+
+START = datetime(2024, 3, 1)
+
+def _decision(
+    index: int,
+    scenario_type: str,
+    stakeholders: List[str],
+    impacts: Dict[str, float],
+    time_spent: int = 60,
+    difficulty: float = 0.5
+) -> Decision:
+    """Build the index-th decision of a history"""
+    return Decision(
+        id=f"decision_{index}",
+        timestamp=START + timedelta(minutes=index),
+        scenario_type=scenario_type,
+        choice="option_a",
+        stakeholders_affected=stakeholders,
+        impacts=impacts,
+        rationale="",
+        time_spent=time_spent,
+        difficulty_level=difficulty
+    )
+
+@pytest.fixture
+def analyzer():
+    """Create a pattern analyzer"""
+    return PatternAnalyzer()
+
+@pytest.fixture
+def decisions() -> List[Decision]:
+    """Fixed history of labor and quickly dismissed privacy decisions"""
+    return [
+        _decision(0, "labor", ["employees"], {"employees": 20, "financial": -10}),
+        _decision(
+            1,
+            "labor",
+            ["employees", "community"],
+            {"employees": 40, "community": 0, "financial": -20},
+            time_spent=90
+        ),
+        _decision(2, "privacy", ["customers"], {"customers": 4, "financial": 2}, time_spent=10),
+        _decision(
+            3,
+            "labor",
+            ["employees"],
+            {"employees": 20, "financial": -10, "decision_making": 50},
+            difficulty=1.0
+        ),
+        _decision(4, "privacy", ["customers"], {"customers": -6, "financial": 0}, time_spent=10)
+    ]
+
+class TestPatternAnalyzer:
+    """Test suite for decision pattern analysis and its cache"""
+
+    def test_analyze_patterns_hand_computed(self, analyzer, decisions):
+        """Test every pattern field on a fixed decision history"""
+        # Act
+        pattern = analyzer.analyze_patterns(decisions)
+
+        # Assert: financial minus mean stakeholder impact: -30, -40, -2, -30, 6
+        assert pattern.bias_score == pytest.approx(-0.96 / 3)
+        assert pattern.stakeholder_preferences == pytest.approx({
+            "employees": (80 / 3 + 100) / 200,
+            "community": 0.5,
+            "customers": 0.495
+        })
+        assert list(pattern.stakeholder_preferences) == [
+            "employees",
+            "community",
+            "customers"
+        ]
+        assert pattern.avoided_topics == ["privacy"]
+        assert pattern.skill_levels == pytest.approx({
+            "stakeholder_management": 0.5,
+            "ethical_reasoning": 0.5,
+            "strategic_thinking": 0.5,
+            "leadership": (4 * 0.5 + (50 / 3 + 100) / 200) / 5
+        })
+        assert pattern.learning_rate == 0.5  # fewer than 10 decisions
+        assert pattern.decision_speed == 1  # clamped
+        # Labor pairs 0.725, 0.958, 0.7; the privacy pair 0.985
+        assert pattern.consistency_score == pytest.approx(
+            ((0.725 + (1 + 11 / 12) / 2 + 0.7) / 3 + 0.985) / 2
+        )
+        # Only decisions 0 and 1 are consecutive of the same type
+        times = np.array([60, 90, 10, 60, 10])
+        assert pattern.confidence == pytest.approx(
+            (1 - np.std(times / times.mean()) + 0.725 + 1) / 3
+        )
+
+    def test_analyze_patterns_without_stakeholders(self, analyzer):
+        """Test decisions affecting no stakeholders count as alike on them"""
+        # Arrange
+        decisions = [
+            _decision(i, "audit", [], {"financial": 10 * i})
+            for i in range(5)
+        ]
+
+        # Act
+        pattern = analyzer.analyze_patterns(decisions)
+
+        # Assert: impact differences average 20 across all pairs, 10
+        # between consecutive decisions
+        assert pattern.stakeholder_preferences == {}
+        assert pattern.consistency_score == pytest.approx(
+            (1 - 20 / 200 + EMPTY_STAKEHOLDER_SIMILARITY) / 2
+        )
+        assert pattern.confidence == pytest.approx(
+            (1 + (1 - 10 / 200 + EMPTY_STAKEHOLDER_SIMILARITY) / 2 + 1) / 3
+        )
+
+    def test_pairwise_similarity_matches_pair_similarity(self, analyzer, decisions):
+        """Test the similarity matrix equals the per-pair similarity"""
+        # Arrange: include a pair with no stakeholders
+        decisions = decisions + [
+            _decision(5, "audit", [], {"financial": 10}),
+            _decision(6, "audit", [], {"immediate": 30})
+        ]
+        bits = {"employees": 1, "community": 2, "customers": 4}
+        masks = [
+            sum(bits[s] for s in d.stakeholders_affected)
+            for d in decisions
+        ]
+
+        # Act
+        similarities = analyzer._pairwise_similarity(decisions)
+
+        # Assert
+        for i, first in enumerate(decisions):
+            for j, second in enumerate(decisions):
+                assert similarities[i, j] == pytest.approx(
+                    analyzer._calculate_decision_similarity(
+                        first,
+                        second,
+                        masks[i],
+                        masks[j]
+                    )
+                )
+        # (1 - (10 + 30) / 200 / 2 + 1) / 2
+        assert similarities[5, 6] == pytest.approx(0.95)
+
+    def test_pattern_cache_hit(self, analyzer, decisions):
+        """Test an unchanged history reuses the cached analysis"""
+        # Arrange
+        calls = 0
+        analyze = analyzer._analyze
+
+        def counting_analyze(history):
+            nonlocal calls
+            calls += 1
+            return analyze(history)
+
+        analyzer._analyze = counting_analyze
+
+        # Act
+        first = analyzer.analyze_patterns(decisions, current_level=3)
+        second = analyzer.analyze_patterns(list(decisions), current_level=3)
+
+        # Assert
+        assert second is first
+        assert calls == 1
+        assert len(analyzer._pattern_cache) == 1
+
+    def test_pattern_cache_miss(self, analyzer, decisions):
+        """Test a longer history or another level is analyzed afresh"""
+        # Arrange
+        first = analyzer.analyze_patterns(decisions, current_level=3)
+
+        # Act
+        longer = analyzer.analyze_patterns(
+            decisions + [_decision(5, "labor", ["employees"], {"employees": 10})],
+            current_level=3
+        )
+        leveled = analyzer.analyze_patterns(decisions, current_level=4)
+
+        # Assert
+        assert longer is not first
+        assert longer.consistency_score != first.consistency_score
+        assert leveled is not first
+        assert leveled == first
+        assert len(analyzer._pattern_cache) == 3
+
+    def test_short_history_not_cached(self, analyzer, decisions):
+        """Test histories below the minimum get the initial pattern"""
+        # Act
+        pattern = analyzer.analyze_patterns(decisions[:4])
+
+        # Assert
+        assert pattern == analyzer._generate_initial_pattern()
+        assert len(analyzer._pattern_cache) == 0